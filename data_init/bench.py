@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import psycopg
+
+# 基准测试：按规模与目标（临时 PostgreSQL / 离线导出）逐次运行 main.py，收集各阶段耗时、行数与峰值内存
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(HERE, "main.py")
+INIT_SQL = os.path.join(HERE, "..", "sql", "init.sql")
+TARGETS = ("postgres", "offline")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def _pg_tool(pg_bin: str | None, name: str) -> str:
+    path = os.path.join(pg_bin, name) if pg_bin else shutil.which(name)
+    if not path:
+        raise SystemExit(f"找不到 {name}：请安装 PostgreSQL 或用 --pg-bin 指定其 bin 目录（也可用 --dsn 指定一个可丢弃的数据库）")
+    return path
+
+
+@contextmanager
+def throwaway_postgres(pg_bin: str | None):
+    # 临时目录中 initdb 一个实例，只监听 localhost 的随机端口，结束后停止并删除（需以非 root 用户运行）
+    data = tempfile.mkdtemp(prefix="carco-bench-pg-")
+    try:
+        subprocess.run(
+            [_pg_tool(pg_bin, "initdb"), "-D", data, "-A", "trust", "-U", "postgres", "-E", "UTF8"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        port = _free_port()
+        pg_ctl = _pg_tool(pg_bin, "pg_ctl")
+        subprocess.run(
+            [pg_ctl, "-D", data, "-l", os.path.join(data, "server.log"), "-w", "-o", f"-p {port} -c listen_addresses=localhost", "start"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        try:
+            yield f"postgresql://postgres@localhost:{port}/postgres"
+        finally:
+            subprocess.run([pg_ctl, "-D", data, "-m", "immediate", "-w", "stop"], stdout=subprocess.DEVNULL)
+    finally:
+        shutil.rmtree(data, ignore_errors=True)
+
+
+def apply_schema(dsn: str):
+    with open(INIT_SQL, encoding="utf-8") as f:
+        script = f.read()
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(script)
+
+
+def run_main(argv: list[str], env: dict) -> dict:
+    with tempfile.TemporaryDirectory(prefix="carco-bench-") as tmp:
+        report_path = os.path.join(tmp, "report.json")
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, MAIN, *argv, "--report", report_path],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace",
+        )
+        wall = time.perf_counter() - started
+        if proc.returncode != 0:
+            raise SystemExit(f"main.py {' '.join(argv)} 失败（{proc.returncode}）：\n{proc.stderr[-4000:]}")
+        with open(report_path, encoding="utf-8") as f:
+            report = json.load(f)
+    report["wall_seconds"] = wall
+    return report
+
+
+def bench_target(target: str, dsn: str | None, scales: list[list[str]], args) -> list[dict]:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("PG") and k != "DATABASE_URL"}
+    common = ["--seed", str(args.seed), "--workers", str(args.workers), "--chunk-size", str(args.chunk_size)]
+    results = []
+    for scale in scales:
+        argv = [*common, *scale]
+        if target == "postgres":
+            # 每个规模先 --reset：reset 阶段即清空上一规模数据的耗时
+            env["DATABASE_URL"] = dsn
+            report = run_main([*argv, "--reset", "--yes", *(["--fast-load"] if args.fast_load else [])], env)
+        else:
+            with tempfile.TemporaryDirectory(prefix="carco-bench-out-") as out:
+                report = run_main([*argv, "--output-dir", os.path.join(out, "data"), "--export-format", args.export_format], env)
+        report["target"] = target
+        results.append(report)
+        vehicles = report["vehicles"]
+        for stage in report["stages"]:
+            rate = f"{stage['rows_per_sec']:>12,.0f} rows/s" if stage["rows_per_sec"] else ""
+            print(f"{target:<9}{vehicles:>10,}  {stage['name']:<18}{stage['seconds']:>9.2f}s {rate}", flush=True)
+        rss = report["peak_rss_bytes"]
+        peak = max(v for v in rss.values() if v is not None) / 2**20 if any(rss.values()) else float("nan")
+        print(f"{target:<9}{vehicles:>10,}  {'total':<18}{report['wall_seconds']:>9.2f}s   peak RSS {peak:,.0f} MiB", flush=True)
+    return results
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> list[str]:
+    # rows/s 下降或峰值内存上升超过容差即视为回退
+    old_stages = {(r["target"], r["vehicles"], s["name"]): s for r in baseline["results"] for s in r["stages"]}
+    old_runs = {(r["target"], r["vehicles"]): r for r in baseline["results"]}
+    regressions = []
+    for run in results:
+        for stage in run["stages"]:
+            old = old_stages.get((run["target"], run["vehicles"], stage["name"]))
+            if old and old["rows_per_sec"] and stage["rows_per_sec"] and stage["rows_per_sec"] < old["rows_per_sec"] * (1 - tolerance):
+                regressions.append(
+                    f"{run['target']} {run['vehicles']} {stage['name']}: {stage['rows_per_sec']:,.0f} rows/s < 基线 {old['rows_per_sec']:,.0f}"
+                )
+        old = old_runs.get((run["target"], run["vehicles"]))
+        new_rss, old_rss = run["peak_rss_bytes"]["self"], old and old["peak_rss_bytes"]["self"]
+        if new_rss and old_rss and new_rss > old_rss * (1 + tolerance):
+            regressions.append(f"{run['target']} {run['vehicles']} peak RSS: {new_rss / 2**20:,.0f} MiB > 基线 {old_rss / 2**20:,.0f} MiB")
+    return regressions
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CarCo data_init benchmark")
+    parser.add_argument("--scales", default="10000,100000,1000000", help="逗号分隔的 --vehicles 规模")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="postgres（临时实例）和/或 offline（离线导出，不连数据库）")
+    parser.add_argument("--dsn", default=None, help="使用已有的可丢弃数据库代替临时实例（其 carco 架构会被重建！）")
+    parser.add_argument("--pg-bin", default=None, help="initdb/pg_ctl 所在目录（默认从 PATH 查找）")
+    parser.add_argument("--scale-factors", default=None, help="逗号分隔的 --scale-factor（如 1,10,100），按场景比例同步放大全部维度；指定时忽略 --scales")
+    parser.add_argument("--scenario", default=None, help="传给 main.py 的场景文件")
+    parser.add_argument("--customers-ratio", type=float, default=0.25, help="客户数 = 车辆数 × 该比例")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--fast-load", action="store_true", help="postgres 目标使用 --fast-load")
+    parser.add_argument("--export-format", default="binary", help="offline 目标的导出格式")
+    parser.add_argument("--out", default="bench.json", help="结果 JSON 路径")
+    parser.add_argument("--baseline", default=None, help="与之前的结果 JSON 对比，回退时以非零状态退出")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="回退判定容差（比例）")
+    args = parser.parse_args()
+
+    # 每个规模对应一组 main.py 参数：规模因子，或车辆数与按比例的客户数
+    if args.scale_factors:
+        scales = [["--scale-factor", sf] for sf in args.scale_factors.split(",") if sf]
+    else:
+        scales = [
+            ["--vehicles", str(v), "--customers", str(max(1, int(v * args.customers_ratio)))]
+            for v in (int(s) for s in args.scales.split(",") if s)
+        ]
+    if args.scenario:
+        scales = [[*scale, "--scenario", os.path.abspath(args.scenario)] for scale in scales]
+    targets = [t for t in args.targets.split(",") if t]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        raise SystemExit(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    results: list[dict] = []
+    for target in targets:
+        if target == "offline":
+            results += bench_target(target, None, scales, args)
+        elif args.dsn:
+            apply_schema(args.dsn)
+            results += bench_target(target, args.dsn, scales, args)
+        else:
+            with throwaway_postgres(args.pg_bin) as dsn:
+                apply_schema(dsn)
+                results += bench_target(target, dsn, scales, args)
+
+    output = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"回退：{line}")
+        if regressions:
+            raise SystemExit(1)
+        print("与基线相比无回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+import re
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+import psycopg
+
+from checkpoint import record_chunk
+from generate import GenJob
+from report import COUNTERS, count_time, shard_metrics
+
+
+# 语句中的 carco. 限定名按连接的目标架构改写（--swap 时先灌入 carco_staging）
+_QUALIFIED = re.compile(r"\bcarco\.")
+
+
+def _in_schema(conn, query):
+    schema = getattr(conn, "schema", "carco")
+    if schema == "carco" or not isinstance(query, str):
+        return query
+    return _QUALIFIED.sub(f"{schema}.", query)
+
+
+def _count(started: float, statements: int, round_trips: int = 1):
+    COUNTERS.add("statements", statements)
+    COUNTERS.add("round_trips", round_trips)
+    COUNTERS.add("db_seconds", time.perf_counter() - started)
+
+
+def _pipelined(conn) -> bool:
+    return conn.pgconn.pipeline_status != psycopg.pq.PipelineStatus.OFF
+
+
+# 计时游标/连接：每条语句、每次 COPY 与提交/回滚计一次往返；COPY 块内的逐行编码也计入数据库时间
+# 管道模式下的语句只计语句数，整批在同步点计一次往返（见 pipeline()）
+class TimedCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        query = _in_schema(self.connection, query)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            _count(started, 1, 0 if _pipelined(self.connection) else 1)
+
+    @contextmanager
+    def copy(self, statement, params=None, **kwargs):
+        statement = _in_schema(self.connection, statement)
+        started = time.perf_counter()
+        try:
+            with super().copy(statement, params, **kwargs) as copy:
+                yield copy
+        finally:
+            _count(started, 1)
+
+
+class TimedConnection(psycopg.Connection):
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            _count(started, 0)
+
+    def rollback(self):
+        started = time.perf_counter()
+        try:
+            super().rollback()
+        finally:
+            _count(started, 0)
+
+
+@contextmanager
+def pipeline(conn):
+    # psycopg 管道模式：块内语句连续发送不等待结果，退出时一次同步取回；libpq 不支持时退化为逐条执行
+    if not psycopg.Pipeline.is_supported():
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        with conn.pipeline():
+            yield
+    finally:
+        _count(started, 0)
+
+
+def connect(dsn: str, schema: str = "carco"):
+    conn = TimedConnection.connect(dsn, cursor_factory=TimedCursor)
+    conn.autocommit = False
+    conn.schema = schema
+    with conn.cursor() as cur:
+        cur.execute(f"SET search_path TO {schema}, public;")
+        conn.commit()
+        # OpenGauss 专有语法；PostgreSQL 上失败时回滚，避免后续语句处于中止事务中
+        try:
+            cur.execute(f"SET CURRENT_SCHEMA TO {schema};")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+    return conn
+
+
+# 维度表列定义（离线导出时使用），顺序即外键依赖顺序
+DIMENSION_TABLES: dict[str, tuple[tuple[str, str], ...]] = {
+    "brand": (("brand_id", "int8"), ("name", "text")),
+    "model": (("model_id", "int8"), ("brand_id", "int8"), ("name", "text")),
+    "color": (("color_id", "int8"), ("name", "text")),
+    "part_category": (("category_id", "int8"), ("name", "text")),
+    "part_spec": (("part_spec_id", "int8"), ("category_id", "int8"), ("name", "text"), ("spec_code", "text")),
+    "supplier": (("supplier_id", "int8"), ("name", "text")),
+    "supplier_part_spec": (("supplier_id", "int8"), ("part_spec_id", "int8")),
+    "model_part_spec": (("model_id", "int8"), ("part_spec_id", "int8")),
+    "configuration": (
+        ("config_id", "int8"),
+        ("model_id", "int8"),
+        ("engine_displacement", "numeric"),
+        ("transmission_spec_id", "int8"),
+    ),
+    "dealer": (("dealer_id", "int8"), ("name", "text"), ("city", "text"), ("province", "text")),
+}
+
+# 事实表的 COPY 列定义（列名, 二进制类型），顺序即外键依赖顺序
+# char(1) 以 text 传输；numeric 在二进制格式下需要 Decimal
+FACT_TABLES: dict[str, tuple[tuple[str, str], ...]] = {
+    "customer": (
+        ("customer_id", "int8"),
+        ("name", "text"),
+        ("gender", "text"),
+        ("income", "numeric"),
+        ("city", "text"),
+    ),
+    "transmission_unit": (
+        ("transmission_unit_id", "int8"),
+        ("part_spec_id", "int8"),
+        ("supplier_id", "int8"),
+        ("serial_number", "text"),
+        ("production_date", "date"),
+    ),
+    "vehicle": (
+        ("vehicle_id", "int8"),
+        ("vin", "text"),
+        ("model_id", "int8"),
+        ("config_id", "int8"),
+        ("color_id", "int8"),
+        ("transmission_unit_id", "int8"),
+        ("manufacture_date", "date"),
+    ),
+    "inventory_assignment": (
+        ("vehicle_id", "int8"),
+        ("dealer_id", "int8"),
+        ("received_at", "date"),
+    ),
+    "sale": (
+        ("sale_id", "int8"),
+        ("vehicle_id", "int8"),
+        ("dealer_id", "int8"),
+        ("customer_id", "int8"),
+        ("sale_date", "date"),
+        ("sale_price", "numeric"),
+    ),
+}
+
+# 预聚合汇总表（见 rollup.py），运行结束时整表写入
+ROLLUP_TABLES: dict[str, tuple[tuple[str, str], ...]] = {
+    "rollup_sales_monthly": (
+        ("month", "date"),
+        ("brand_id", "int8"),
+        ("model_id", "int8"),
+        ("units", "int8"),
+        ("revenue", "numeric"),
+    ),
+    "rollup_dealer_dwell": (("dealer_id", "int8"), ("month", "date"), ("sold_units", "int8"), ("dwell_days", "int8")),
+    "rollup_recall_hits": (
+        ("supplier_id", "int8"),
+        ("part_spec_id", "int8"),
+        ("model_id", "int8"),
+        ("month", "date"),
+        ("units", "int8"),
+        ("sold_units", "int8"),
+    ),
+}
+
+TABLES = {**DIMENSION_TABLES, **FACT_TABLES, **ROLLUP_TABLES}
+
+# 维度表 -> (主键列或 None, 自然键列, 其余列)：按自然键查找，不存在时插入（对应关系表没有主键列）
+DIMENSION_KEYS: dict[str, tuple[str | None, tuple[str, ...], tuple[str, ...]]] = {
+    "brand": ("brand_id", ("name",), ()),
+    "model": ("model_id", ("brand_id", "name"), ()),
+    "color": ("color_id", ("name",), ()),
+    "part_category": ("category_id", ("name",), ()),
+    "part_spec": ("part_spec_id", ("spec_code",), ("category_id", "name")),
+    "supplier": ("supplier_id", ("name",), ()),
+    "supplier_part_spec": (None, ("supplier_id", "part_spec_id"), ()),
+    "model_part_spec": (None, ("model_id", "part_spec_id"), ()),
+    "configuration": ("config_id", ("model_id", "engine_displacement", "transmission_spec_id"), ()),
+    "dealer": ("dealer_id", ("name",), ("city", "province")),
+}
+
+# 带序列主键的表 -> 主键列
+SERIAL_KEYS = {
+    "brand": "brand_id",
+    "model": "model_id",
+    "color": "color_id",
+    "part_category": "category_id",
+    "part_spec": "part_spec_id",
+    "supplier": "supplier_id",
+    "configuration": "config_id",
+    "dealer": "dealer_id",
+    "customer": "customer_id",
+    "transmission_unit": "transmission_unit_id",
+    "vehicle": "vehicle_id",
+    "sale": "sale_id",
+}
+
+
+def upsert_sql(table: str) -> str:
+    # 查找与插入合成一条语句（不依赖 ON CONFLICT，兼容 OpenGauss），返回已有或新建的主键，无需先查后写两次往返
+    pk, keys, others = DIMENSION_KEYS[table]
+    cols = (*keys, *others)
+    match = " AND ".join(f"{c} = %({c})s" for c in keys)
+    insert = (
+        f"INSERT INTO carco.{table}({', '.join(cols)}) SELECT {', '.join(f'%({c})s' for c in cols)}"
+        f" WHERE NOT EXISTS (SELECT 1 FROM carco.{table} WHERE {match})"
+    )
+    if pk is None:
+        return insert
+    return (
+        f"WITH found AS (SELECT {pk} FROM carco.{table} WHERE {match}), ins AS ({insert} RETURNING {pk})"
+        f" SELECT {pk} FROM found UNION ALL SELECT {pk} FROM ins"
+    )
+
+
+def upsert_dimensions(conn, batches: dict[str, list[dict]]) -> dict[str, list[int | None]]:
+    # 同一层级（互不依赖）的全部 upsert 在管道模式下连续发送、一次取回；同一事务内按序执行，批内重复的自然键也只插入一次
+    pending = []
+    with pipeline(conn):
+        for table, rows in batches.items():
+            query = upsert_sql(table)
+            for row in rows:
+                cur = conn.cursor()
+                cur.execute(query, row)
+                pending.append((table, cur))
+    ids: dict[str, list[int | None]] = {table: [] for table in batches}
+    for table, cur in pending:
+        ids[table].append(cur.fetchone()[0] if DIMENSION_KEYS[table][0] else None)
+        cur.close()
+    return ids
+
+
+def reserve_id_sql(table: str) -> str:
+    # 一条语句把序列推进 n 个值并返回区间起点，之后由客户端直接分配主键；参数为 (n, n)
+    seq = f"pg_get_serial_sequence('carco.{table}', '{SERIAL_KEYS[table]}')"
+    return f"SELECT setval({seq}, nextval({seq}) + %s - 1) - %s + 1"
+
+
+def reserve_id_range(cur, table: str, n: int) -> int:
+    if n <= 0:
+        return 1
+    cur.execute(reserve_id_sql(table), (n, n))
+    return cur.fetchone()[0]
+
+
+def reserve_id_ranges(conn, sizes: dict[str, int]) -> dict[str, int]:
+    # 多张表的主键区间在一次管道同步内预留
+    pending = {}
+    with pipeline(conn):
+        for table, n in sizes.items():
+            if n > 0:
+                pending[table] = conn.cursor()
+                pending[table].execute(reserve_id_sql(table), (n, n))
+    bases = {table: 1 for table in sizes}
+    for table, cur in pending.items():
+        bases[table] = cur.fetchone()[0]
+        cur.close()
+    return bases
+
+
+def binary_rows(table: str, rows: list[tuple]):
+    # 二进制格式的 numeric 需要 Decimal
+    numeric_idx = [i for i, (_, t) in enumerate(TABLES[table]) if t == "numeric"]
+    if not numeric_idx:
+        yield from rows
+        return
+    for row in rows:
+        row = list(row)
+        for i in numeric_idx:
+            if row[i] is not None:
+                row[i] = Decimal(str(row[i]))
+        yield row
+
+
+def copy_rows(cur, table: str, rows: list[tuple], fmt: str = "binary", schema: str = "carco", into: str | None = None):
+    # into：实际写入的表（如按月分区的叶子分区），列定义仍取 table 的
+    if not rows:
+        return
+    cols = TABLES[table]
+    names = ", ".join(c for c, _ in cols)
+    target = f"{schema}.{into or table}"
+    if fmt == "binary":
+        with cur.copy(f"COPY {target} ({names}) FROM STDIN (FORMAT BINARY)") as copy:
+            copy.set_types([t for _, t in cols])
+            for row in binary_rows(table, rows):
+                copy.write_row(row)
+    else:
+        with cur.copy(f"COPY {target} ({names}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+
+def load_dataset(cur, rows: dict[str, list[tuple]], batch_size: int = 10000, fmt: str = "binary") -> dict[str, int]:
+    # 主键已由客户端分配，按外键顺序整表写出即可，无需任何回查
+    batch_size = max(1, batch_size)
+    for table in FACT_TABLES:
+        table_rows = rows.get(table, [])
+        for start in range(0, len(table_rows), batch_size):
+            copy_rows(cur, table, table_rows[start:start + batch_size], fmt)
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def write_shard(
+    conn,
+    partitioned: bool,
+    batch_size: int,
+    fmt: str,
+    run_id: int | None,
+    kind: str,
+    start: int,
+    stop: int,
+    rows: dict[str, list[tuple]],
+    demand: dict[int, int],
+    rollup: dict | None,
+) -> dict[str, int]:
+    # 写入一个已生成的分片并连同检查点在同一事务中提交；partitioned 表示入库/销售为按月分区表（见 partition.py），
+    # 车辆分片的这两张表按月直接写入叶子分区。数据集缓存命中的分片（rows 为 cache.CachedShard）把缓存文件原样流入 COPY
+    from cache import CachedShard
+
+    with conn.cursor() as cur:
+        if isinstance(rows, CachedShard):
+            counts = rows.load(cur)
+        elif partitioned and kind == "vehicle":
+            from partition import load_vehicle_shard
+
+            counts = load_vehicle_shard(cur, rows, batch_size, fmt)
+        else:
+            counts = load_dataset(cur, rows, batch_size, fmt)
+        record_chunk(cur, run_id, kind, start, stop, demand, rollup)
+    conn.commit()
+    return counts
+
+
+def load_shard(
+    dsn: str,
+    schema: str,
+    batch_size: int,
+    fmt: str,
+    run_id: int | None,
+    partitioned: bool,
+    cache,
+    job: GenJob,
+    kind: str,
+    start: int,
+    stop: int,
+) -> tuple[dict[int, int], dict | None, dict[str, int], dict]:
+    # 进程池工作函数：独立连接生成并写入一个键区间，连同检查点一起提交；返回本分片的计数器差值
+    # partitioned 表示入库/销售为按月分区表（见 partition.py）；cache 为数据集缓存（见 cache.py），命中时跳过生成
+    from cache import cached_generate
+
+    with shard_metrics({}) as metrics:
+        conn = connect(dsn, schema)
+        try:
+            with count_time("generate_seconds"):
+                rows, demand, rollup = cached_generate(cache, job, kind, start, stop)
+            counts = write_shard(conn, partitioned, batch_size, fmt, run_id, kind, start, stop, rows, demand, rollup)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    return demand, rollup, counts, metrics
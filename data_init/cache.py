@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+
+from bulk import TABLES
+from export import write_binary
+from generate import GenJob, generate_shard
+from report import COUNTERS
+
+# 数据集缓存（--cache-dir）：以 (代码版本, 完整生成作业, 分片键区间) 的哈希为键，每个分片一个目录，
+# 内含各表的 PostgreSQL 二进制 COPY 文件与 meta.json（行数、规格需求、汇总增量）。
+# 生成作业已包含种子、场景解析出的维度主键、规模对应的数量、预留的主键区间与日期区间，任何一项不同都不会命中。
+# 命中时跳过生成，文件原样流入 COPY；按目录最近使用时间做 LRU 淘汰
+COPY_BLOCK = 1 << 20
+# 残留的临时目录（写入中途退出）超过该时长后清除
+STALE_SECONDS = 3600
+
+_code_version: dict[str, str] = {}
+
+
+def code_version(name_source: str) -> str:
+    # data_init 全部源码 + numpy 版本（随机分布的实现可能随版本变化）；faker 姓名另含 Faker 版本
+    if name_source not in _code_version:
+        h = hashlib.sha256(np.__version__.encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(here)):
+            if name.endswith(".py"):
+                with open(os.path.join(here, name), "rb") as f:
+                    h.update(name.encode() + f.read())
+        if name_source == "faker":
+            from importlib.metadata import PackageNotFoundError, version
+
+            try:
+                h.update(version("Faker").encode())
+            except PackageNotFoundError:
+                pass
+        _code_version[name_source] = h.hexdigest()
+    return _code_version[name_source]
+
+
+@dataclass
+class CachedShard:
+    # 以二进制 COPY 文件保存的分片（缓存命中，或多目标灌数的暂存分片）：写入端用 load() 把文件原样流入 COPY，代替逐行编码
+    path: str
+    counts: dict[str, int]
+
+    def load(self, cur) -> dict[str, int]:
+        for table, cols in TABLES.items():
+            path = os.path.join(self.path, f"{table}.bin")
+            if not os.path.exists(path):
+                continue
+            names = ", ".join(c for c, _ in cols)
+            with cur.copy(f"COPY carco.{table} ({names}) FROM STDIN (FORMAT BINARY)") as copy, open(path, "rb") as f:
+                while data := f.read(COPY_BLOCK):
+                    copy.write(data)
+        return dict(self.counts)
+
+
+class DatasetCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, job: GenJob, kind: str, start: int, stop: int) -> str:
+        h = hashlib.sha256(code_version(job.name_source).encode())
+        h.update(repr(job).encode())
+        h.update(f"{kind}:{start}:{stop}".encode())
+        key = h.hexdigest()
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, job: GenJob, kind: str, start: int, stop: int) -> tuple[CachedShard, dict[int, int], dict | None] | None:
+        path = self._path(job, kind, start, stop)
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return CachedShard(path, meta["counts"]), {int(k): v for k, v in meta["demand"].items()}, meta["rollup"]
+
+    def put(self, job: GenJob, kind: str, start: int, stop: int, rows: dict[str, list[tuple]], demand: dict[int, int], rollup: dict | None):
+        # 先写临时目录再整体改名：并发写入同一分片（多个进程/环境）时只保留先完成的一份，读者不会看到半个分片
+        path = self._path(job, kind, start, stop)
+        if os.path.isdir(path):
+            return
+        tmp = os.path.join(self.root, f"tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        try:
+            for table, table_rows in rows.items():
+                if table_rows:
+                    write_binary(os.path.join(tmp, f"{table}.bin"), table, table_rows)
+            meta = {
+                "kind": kind,
+                "start": start,
+                "stop": stop,
+                "counts": {table: len(table_rows) for table, table_rows in rows.items()},
+                "demand": demand,
+                "rollup": rollup,
+            }
+            with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.rename(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def evict(self, keep_since: float) -> tuple[int, int]:
+        # 按最近使用时间从旧到新删除分片目录，直到总大小不超过上限；本次运行用过的（keep_since 之后）不删除。返回 (删除数, 剩余字节)
+        entries = []
+        for prefix in os.scandir(self.root):
+            if prefix.name.startswith("tmp-"):
+                if time.time() - prefix.stat().st_mtime > STALE_SECONDS:
+                    shutil.rmtree(prefix.path, ignore_errors=True)
+                continue
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or mtime >= keep_since:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed, total
+
+
+def cached_generate(cache: DatasetCache | None, job: GenJob, kind: str, start: int, stop: int):
+    # generate_shard 的缓存版本：命中时各表行为 CachedShard，未命中时生成并写入缓存
+    if cache is None:
+        return generate_shard(job, kind, start, stop)
+    hit = cache.get(job, kind, start, stop)
+    if hit is not None:
+        COUNTERS.add("cache_hits")
+        return hit
+    rows, demand, rollup = generate_shard(job, kind, start, stop)
+    cache.put(job, kind, start, stop, rows, demand, rollup)
+    COUNTERS.add("cache_misses")
+    return rows, demand, rollup
@@ -0,0 +1,137 @@
+import json
+from datetime import date
+
+# 运行元数据：每次运行一行（种子、参数、预留的主键区间），每个已提交分片一行
+# 分片行与该分片数据在同一事务中写入，故“已记录”即“已落库”，失败后可按分片续跑
+METADATA_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS carco.data_init_run (
+      run_id       BIGSERIAL PRIMARY KEY,
+      mode         VARCHAR(20) NOT NULL,
+      seed         BIGINT NOT NULL,
+      params       TEXT NOT NULL,
+      job          TEXT NOT NULL,
+      status       VARCHAR(20) NOT NULL DEFAULT 'running',
+      started_at   TIMESTAMP NOT NULL DEFAULT now(),
+      finished_at  TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS carco.data_init_chunk (
+      run_id       BIGINT NOT NULL REFERENCES carco.data_init_run(run_id),
+      kind         VARCHAR(20) NOT NULL,
+      start_key    BIGINT NOT NULL,
+      stop_key     BIGINT NOT NULL,
+      demand       TEXT NOT NULL,
+      rollup       TEXT,
+      committed_at TIMESTAMP NOT NULL DEFAULT now(),
+      PRIMARY KEY (run_id, kind, start_key)
+    )
+    """,
+)
+
+# GenJob 中需要持久化的日期字段
+_DATE_FIELDS = ("date_start", "date_end", "sale_cap")
+
+
+def ensure_metadata_tables(conn):
+    with conn.cursor() as cur:
+        for ddl in METADATA_DDL:
+            cur.execute(ddl)
+    conn.commit()
+
+
+def record_chunk(cur, run_id: int | None, kind: str, start: int, stop: int, demand: dict[int, int], rollup: dict | None):
+    # 由写入分片的同一事务调用；汇总增量一并保存，续跑时无需重新生成已提交分片
+    if run_id is None:
+        return
+    cur.execute(
+        "INSERT INTO carco.data_init_chunk(run_id, kind, start_key, stop_key, demand, rollup) VALUES (%s, %s, %s, %s, %s, %s)",
+        (run_id, kind, start, stop, json.dumps(demand), None if rollup is None else json.dumps(rollup)),
+    )
+
+
+def _job_state(job) -> dict:
+    state = {
+        "seed": job.seed,
+        "bases": job.bases,
+        "customers": job.customers,
+        "spare_counts": {str(k): v for k, v in job.spare_counts.items()},
+        "vin_check_digit": job.vin_check_digit,
+        "name_source": job.name_source,
+        "rollups": job.rollups,
+    }
+    for name in _DATE_FIELDS:
+        value = getattr(job, name)
+        state[name] = value.isoformat() if value else None
+    return state
+
+
+class Checkpoint:
+    def __init__(self, conn, run_id: int, mode: str, seed: int, params: dict, job_state: dict):
+        self.conn = conn
+        self.run_id = run_id
+        self.mode = mode
+        self.seed = seed
+        self.params = params
+        self.job_state = job_state
+        self._chunks: dict[tuple[str, int], tuple[dict[int, int], dict | None]] = {}
+
+    @classmethod
+    def start(cls, conn, mode: str, params: dict, job) -> "Checkpoint":
+        # 在维度与主键预留的同一事务中登记运行，随其一起提交
+        state = _job_state(job)
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO carco.data_init_run(mode, seed, params, job) VALUES (%s, %s, %s, %s) RETURNING run_id",
+                (mode, job.seed, json.dumps(params), json.dumps(state)),
+            )
+            run_id = cur.fetchone()[0]
+        return cls(conn, run_id, mode, job.seed, params, state)
+
+    @classmethod
+    def resume(cls, conn) -> "Checkpoint":
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT run_id, mode, seed, params, job FROM carco.data_init_run WHERE status = 'running' ORDER BY run_id DESC LIMIT 1"
+            )
+            row = cur.fetchone()
+            if row is None:
+                raise SystemExit("没有可续跑的运行（carco.data_init_run 中无 running 记录）")
+            run_id, mode, seed, params, state = row
+            ckpt = cls(conn, run_id, mode, seed, json.loads(params), json.loads(state))
+            cur.execute("SELECT kind, start_key, demand, rollup FROM carco.data_init_chunk WHERE run_id = %s", (run_id,))
+            for kind, start, demand, rollup in cur.fetchall():
+                ckpt._chunks[(kind, start)] = (
+                    {int(k): v for k, v in json.loads(demand).items()},
+                    None if rollup is None else json.loads(rollup),
+                )
+        conn.commit()
+        return ckpt
+
+    def job_kwargs(self) -> dict:
+        # 续跑时按原运行的参数重建 GenJob（维度主键由幂等 upsert 得到，与原运行一致）
+        kwargs = {k: self.job_state[k] for k in ("seed", "bases", "customers", "vin_check_digit", "name_source", "rollups")}
+        kwargs["spare_counts"] = {int(k): v for k, v in self.job_state["spare_counts"].items()}
+        for name in _DATE_FIELDS:
+            value = self.job_state[name]
+            kwargs[name] = date.fromisoformat(value) if value else None
+        return kwargs
+
+    def committed(self, kind: str, start: int) -> tuple[dict[int, int], dict | None] | None:
+        # (规格需求, 汇总增量)
+        return self._chunks.get((kind, start))
+
+    def committed_count(self) -> int:
+        return len(self._chunks)
+
+    def update_job(self, job):
+        # 追加预留的区间（如库存变速器单元）先落库，续跑时复用而不是重新预留
+        self.job_state = _job_state(job)
+        with self.conn.cursor() as cur:
+            cur.execute("UPDATE carco.data_init_run SET job = %s WHERE run_id = %s", (json.dumps(self.job_state), self.run_id))
+
+    def finish(self, status: str = "done"):
+        # failed：数据校验未通过，已提交的分片不可续跑，须 --reset 后重新灌数
+        with self.conn.cursor() as cur:
+            cur.execute("UPDATE carco.data_init_run SET status = %s, finished_at = now() WHERE run_id = %s", (status, self.run_id))
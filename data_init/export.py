@@ -0,0 +1,148 @@
+import csv
+import json
+import os
+import struct
+from datetime import datetime, timezone
+
+from psycopg.adapt import PyFormat, Transformer
+from psycopg.postgres import types as pg_types
+from psycopg.pq import Format
+
+from bulk import DIMENSION_KEYS, DIMENSION_TABLES, SERIAL_KEYS, TABLES, binary_rows
+from generate import GenJob, generate_shard
+from report import count_time, shard_metrics
+
+EXPORT_FORMATS = {"binary": "bin", "csv": "csv", "parquet": "parquet"}
+
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+PGCOPY_TRAILER = struct.pack("!h", -1)
+
+
+# 离线维度：与数据库 upsert 语义一致（按自然键去重），主键在进程内从 1 起顺序分配
+class OfflineDimensions:
+    def __init__(self):
+        self.rows: dict[str, list[tuple]] = {}
+        self.next_ids: dict[str, int] = {}
+        self._keys: dict[tuple, int | None] = {}
+
+    def reserve(self, table: str, n: int) -> int:
+        first = self.next_ids.get(table, 1)
+        self.next_ids[table] = first + max(0, n)
+        return first
+
+    def reserve_many(self, sizes: dict[str, int]) -> dict[str, int]:
+        return {table: self.reserve(table, n) for table, n in sizes.items()}
+
+    def upsert(self, batches: dict[str, list[dict]]) -> dict[str, list[int | None]]:
+        ids: dict[str, list[int | None]] = {}
+        for table, rows in batches.items():
+            pk, keys, _ = DIMENSION_KEYS[table]
+            cols = [c for c, _ in DIMENSION_TABLES[table] if c != pk]
+            out = ids[table] = []
+            for row in rows:
+                key = (table, *(row[c] for c in keys))
+                if key not in self._keys:
+                    values = tuple(row[c] for c in cols)
+                    if pk is None:
+                        self._keys[key] = None
+                        self.rows.setdefault(table, []).append(values)
+                    else:
+                        self._keys[key] = self.reserve(table, 1)
+                        self.rows.setdefault(table, []).append((self._keys[key], *values))
+                out.append(self._keys[key])
+        return ids
+
+
+def write_binary(path: str, table: str, rows: list[tuple]):
+    # PostgreSQL 二进制 COPY 文件：文件头 + 每行(字段数, [长度, 数据]...) + 结束标记
+    cols = TABLES[table]
+    tx = Transformer()
+    tx.set_dumper_types([pg_types.get(t).oid for _, t in cols], Format.BINARY)
+    formats = [PyFormat.BINARY] * len(cols)
+    field_count = struct.pack("!h", len(cols))
+    null = struct.pack("!i", -1)
+    with open(path, "wb") as f:
+        f.write(PGCOPY_HEADER)
+        for row in binary_rows(table, rows):
+            out = [field_count]
+            for value in tx.dump_sequence(row, formats):
+                if value is None:
+                    out.append(null)
+                else:
+                    out.append(struct.pack("!i", len(value)))
+                    out.append(bytes(value))
+            f.write(b"".join(out))
+        f.write(PGCOPY_TRAILER)
+
+
+def _write_csv(path: str, table: str, rows: list[tuple]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([c for c, _ in TABLES[table]])
+        writer.writerows(rows)
+
+
+def _write_parquet(path: str, table: str, rows: list[tuple]):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet 导出需要 pyarrow：pip install pyarrow")
+    arrow_types = {"int8": pa.int64(), "text": pa.string(), "date": pa.date32(), "numeric": pa.decimal128(12, 2)}
+    cols = TABLES[table]
+    schema = pa.schema([(c, arrow_types[t]) for c, t in cols])
+    columns = list(zip(*binary_rows(table, rows))) if rows else [[] for _ in cols]
+    pq.write_table(pa.Table.from_arrays([pa.array(v, type=schema.field(i).type) for i, v in enumerate(columns)], schema=schema), path)
+
+
+_WRITERS = {"binary": write_binary, "csv": _write_csv, "parquet": _write_parquet}
+
+
+def export_rows(out_dir: str, fmt: str, rows: dict[str, list[tuple]], tag: str) -> dict[str, int]:
+    # 每个分片每张表一个文件（<table>/part-<tag>.<ext>），可被并行加载器分别导入
+    for table, table_rows in rows.items():
+        if not table_rows:
+            continue
+        os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+        _WRITERS[fmt](os.path.join(out_dir, table, f"part-{tag}.{EXPORT_FORMATS[fmt]}"), table, table_rows)
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def export_shard(out_dir: str, fmt: str, job: GenJob, kind: str, start: int, stop: int) -> tuple[dict[int, int], dict | None, dict[str, int], dict]:
+    # 进程池工作函数：生成一个键区间并写成文件
+    with shard_metrics({}) as metrics:
+        with count_time("generate_seconds"):
+            rows, demand, rollup = generate_shard(job, kind, start, stop)
+        counts = export_rows(out_dir, fmt, rows, f"{kind}-{start:012d}")
+    return demand, rollup, counts, metrics
+
+
+def write_manifest(out_dir: str, fmt: str, counts: dict[str, int], sequences: dict[str, int], meta: dict):
+    # manifest.json：行数、文件清单与最终序列值；load.sql：psql \copy 导入脚本（Parquet 除外）
+    files = {
+        table: sorted(f"{table}/{name}" for name in os.listdir(os.path.join(out_dir, table)))
+        for table in TABLES
+        if os.path.isdir(os.path.join(out_dir, table))
+    }
+    manifest = {
+        **meta,
+        "format": fmt,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tables": {table: {"rows": counts.get(table, 0), "files": files.get(table, [])} for table in TABLES},
+        "sequences": {table: sequences[table] for table in SERIAL_KEYS if table in sequences},
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    if fmt == "parquet":
+        return
+    options = "FORMAT binary" if fmt == "binary" else "FORMAT csv, HEADER true"
+    lines = ["-- psql -v ON_ERROR_STOP=1 -f load.sql（在本目录下执行）", "BEGIN;"]
+    for table, table_files in files.items():
+        names = ", ".join(c for c, _ in TABLES[table])
+        lines += [f"\\copy carco.{table} ({names}) FROM '{path}' WITH ({options})" for path in table_files]
+    for table, last_id in manifest["sequences"].items():
+        lines.append(f"SELECT setval(pg_get_serial_sequence('carco.{table}', '{SERIAL_KEYS[table]}'), {last_id});")
+    lines.append("COMMIT;")
+    with open(os.path.join(out_dir, "load.sql"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
@@ -0,0 +1,258 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+from psycopg.conninfo import conninfo_to_dict
+
+from bulk import SERIAL_KEYS, connect
+from cache import CachedShard
+from checkpoint import ensure_metadata_tables
+from export import write_binary
+from report import COUNTERS
+from rollup import ensure_rollup_tables, verify_rollups
+
+# 多目标灌数（--dsn 多次）：每个分片只生成一次，写成二进制 COPY 文件暂存在本地（或直接用数据集缓存中的分片），
+# 再由每个目标自己的线程与连接依次 COPY 并逐片提交。队列里只有暂存文件的引用：慢目标的积压留在磁盘上，
+# 只要不超过暂存上限（--fanout-spool-size）就不影响生成与其他目标；超过上限且比其他目标落后时将其摘除（detached），
+# 所有目标都超过上限（生成快于写入）时生成等待。
+# 失败或被摘除的目标记录原因后丢弃剩余分片。主键与离线导出一样从 1 起在进程内分配，因此目标须为空库（或配合 --reset --yes）
+_END = object()
+
+# 目标已有数据时主键会冲突
+EXISTING_SQL = """
+SELECT EXISTS (SELECT 1 FROM carco.dealer) OR EXISTS (SELECT 1 FROM carco.customer) OR EXISTS (SELECT 1 FROM carco.vehicle)
+"""
+
+
+def target_label(dsn: str) -> str:
+    # 报告中的目标名：不含密码
+    info = conninfo_to_dict(dsn)
+    return f"{info.get('host', 'localhost')}:{info.get('port', '5432')}/{info.get('dbname', '')}"
+
+
+class _Spooled:
+    # 一个暂存分片与尚未写完它的目标数；最后一个目标写完（或丢弃）后删除文件，数据集缓存中的分片保留（不计入暂存字节）
+    def __init__(self, shard: CachedShard, refs: int, owned: bool):
+        self.shard = shard
+        self.refs = refs
+        self.owned = owned
+        self.size = sum(f.stat().st_size for f in os.scandir(shard.path)) if owned else 0
+        self.lock = threading.Lock()
+
+    def release(self):
+        with self.lock:
+            self.refs -= 1
+            done = self.refs == 0
+        if done and self.owned:
+            shutil.rmtree(self.shard.path, ignore_errors=True)
+
+
+class Target:
+    def __init__(self, dsn: str, progress: threading.Condition, reset=None, rollups: bool = True):
+        self.dsn = dsn
+        self.label = target_label(dsn)
+        self.reset = reset
+        self.rollups = rollups
+        self.queue: queue.Queue = queue.Queue()
+        # 各目标共享：保护 lag_bytes，目标写完分片或失败时通知等待中的生成端
+        self.progress = progress
+        self.conn = None
+        self.lock = threading.Lock()
+        self.status = "pending"
+        self.error: str | None = None
+        self.rows: dict[str, int] = {}
+        self.seconds = 0.0
+        # 本目标线程的语句数、往返次数与数据库时间（见 report.Counters.isolate）
+        self.counters: dict = {}
+        # 已交给本目标、尚未写完的暂存字节
+        self.lag_bytes = 0
+        # 运行期间积压的最大分片数
+        self.max_backlog = 0
+        # 运行结束时由 FanOut.finish 设置；为 None 时表示生成中途失败，目标不做收尾
+        self.sequences: dict[str, int] | None = None
+        self.thread = threading.Thread(target=self._run, name=f"data-init-target-{self.label}", daemon=True)
+
+    def put(self, item: _Spooled):
+        # 不阻塞：是否摘除或等待由 FanOut.put 在 progress 下判断
+        with self.progress:
+            self.lag_bytes += item.size
+        self.queue.put(item)
+        self.max_backlog = max(self.max_backlog, self.queue.qsize())
+
+    def _done(self, item: _Spooled):
+        with self.progress:
+            self.lag_bytes -= item.size
+            self.progress.notify_all()
+        item.release()
+
+    def _fail(self, status: str, error: str) -> bool:
+        # 只记录第一个原因（写入失败或被摘除）
+        with self.lock:
+            if self.error is not None:
+                return False
+            self.status, self.error = status, error
+        with self.progress:
+            self.progress.notify_all()
+        return True
+
+    def detach(self, reason: str):
+        # 由生成端调用：放弃本目标，取消正在执行的 COPY；线程随后丢弃剩余分片
+        if self._fail("detached", reason) and self.conn is not None:
+            self.conn.cancel_safe()
+
+    def _prepare(self, conn):
+        # 与单目标灌数相同先建元数据表与汇总表（--reset 的 TRUNCATE 也包括它们）
+        ensure_metadata_tables(conn)
+        ensure_rollup_tables(conn)
+        if self.reset is not None:
+            self.reset(conn)
+        with conn.cursor() as cur:
+            cur.execute(EXISTING_SQL)
+            if cur.fetchone()[0]:
+                raise RuntimeError("目标库已有 carco 数据：多目标灌数需要空库（或配合 --reset --yes）")
+        conn.rollback()
+
+    def _load(self, conn, shard: CachedShard):
+        with conn.cursor() as cur:
+            counts = shard.load(cur)
+        conn.commit()
+        for table, count in counts.items():
+            self.rows[table] = self.rows.get(table, 0) + count
+
+    def _finish(self, conn):
+        with conn.cursor() as cur:
+            for table, last_id in self.sequences.items():
+                cur.execute(f"SELECT setval(pg_get_serial_sequence('carco.{table}', '{SERIAL_KEYS[table]}'), %s)", (last_id,))
+            conn.commit()
+            if self.rollups:
+                mismatches = verify_rollups(cur)
+                conn.rollback()
+                if mismatches:
+                    raise RuntimeError(f"汇总表与原始表不一致：{mismatches}")
+
+    def _run(self):
+        started = time.perf_counter()
+        self.counters = COUNTERS.isolate()
+        try:
+            self.conn = connect(self.dsn)
+            self._prepare(self.conn)
+            with self.lock:
+                if self.error is None:
+                    self.status = "loading"
+        except Exception as e:
+            self._fail("failed", f"{type(e).__name__}: {e}")
+        # 失败或被摘除后仍取出剩余分片并释放暂存文件，直到结束标记
+        while (item := self.queue.get()) is not _END:
+            try:
+                if self.error is None:
+                    self._load(self.conn, item.shard)
+            except Exception as e:
+                self._fail("failed", f"{type(e).__name__}: {e}")
+            finally:
+                self._done(item)
+        try:
+            if self.error is None:
+                if self.sequences is None:
+                    self.status = "aborted"
+                else:
+                    self._finish(self.conn)
+                    self.status = "ok"
+        except Exception as e:
+            self._fail("failed", f"{type(e).__name__}: {e}")
+        finally:
+            if self.conn is not None:
+                self.conn.close()
+            self.seconds = time.perf_counter() - started
+
+
+class FanOut:
+    def __init__(self, dsns: list[str], reset=None, rollups: bool = True, spool_limit: int = 4 << 30):
+        self.spool = tempfile.mkdtemp(prefix="carco-fanout-")
+        self.spool_limit = spool_limit
+        self.progress = threading.Condition()
+        self.targets = [Target(dsn, self.progress, reset, rollups) for dsn in dsns]
+        self.closed = False
+        for target in self.targets:
+            target.thread.start()
+
+    def put(self, rows: dict[str, list[tuple]] | CachedShard, tag: str) -> dict[str, int]:
+        # 暂存一个分片并交给所有未失败的目标；rows 为数据集缓存命中的分片时直接共享缓存文件
+        if isinstance(rows, CachedShard):
+            shard, owned = rows, False
+        else:
+            path = os.path.join(self.spool, tag)
+            os.makedirs(path)
+            for table, table_rows in rows.items():
+                if table_rows:
+                    write_binary(os.path.join(path, f"{table}.bin"), table, table_rows)
+            shard, owned = CachedShard(path, {table: len(table_rows) for table, table_rows in rows.items()}), True
+        item = _Spooled(shard, 0, owned)
+        with self.progress:
+            while True:
+                live = [t for t in self.targets if t.error is None]
+                for target in live:
+                    if self._over(target, item) and any(t.lag_bytes < target.lag_bytes for t in live if t.error is None):
+                        lag = target.lag_bytes + item.size
+                        target.detach(f"落后超过暂存上限：待写 {lag / 2**20:,.0f} MiB > {self.spool_limit / 2**20:,.0f} MiB（--fanout-spool-size）")
+                live = [t for t in live if t.error is None]
+                if not live or not any(self._over(t, item) for t in live):
+                    break
+                # 剩下的目标同样落后且都超过上限：生成快于写入，等某个目标写完一个分片
+                self.progress.wait(0.2)
+        if not live:
+            if owned:
+                shutil.rmtree(shard.path, ignore_errors=True)
+            raise SystemExit("所有目标均已失败：" + "；".join(f"{t.label} {t.error}" for t in self.targets))
+        item.refs = len(live)
+        for target in live:
+            target.put(item)
+        return dict(shard.counts)
+
+    def _over(self, target: Target, item: _Spooled) -> bool:
+        # 再积压这个分片就超过暂存上限；没有积压时总能接收（单个分片大于上限也不摘除）
+        return target.lag_bytes > 0 and target.lag_bytes + item.size > self.spool_limit
+
+    def finish(self, sequences: dict[str, int]):
+        # 各目标写完积压的分片后设置序列值并校验汇总表；等待全部目标结束
+        for target in self.targets:
+            target.sequences = sequences
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            for target in self.targets:
+                target.queue.put(_END)
+            for target in self.targets:
+                target.thread.join()
+        shutil.rmtree(self.spool, ignore_errors=True)
+
+    def results(self) -> list[dict]:
+        return [
+            {
+                "target": t.label,
+                "status": t.status,
+                "seconds": t.seconds,
+                "rows": dict(t.rows),
+                "max_backlog": t.max_backlog,
+                "statements": t.counters.get("statements", 0),
+                "round_trips": t.counters.get("round_trips", 0),
+                "db_seconds": t.counters.get("db_seconds", 0.0),
+                "error": t.error,
+            }
+            for t in self.targets
+        ]
+
+    def summary(self) -> str:
+        lines = [f"{'target':<36}{'status':>10}{'seconds':>9}{'rows':>12}{'backlog':>9}{'stmts':>9}{'trips':>9}{'db':>9}"]
+        for r in self.results():
+            lines.append(
+                f"{r['target']:<36}{r['status']:>10}{r['seconds']:>8.2f}s{sum(r['rows'].values()):>12,}{r['max_backlog']:>9}"
+                f"{r['statements']:>9,}{r['round_trips']:>9,}{r['db_seconds']:>8.2f}s"
+            )
+            if r["error"]:
+                lines.append(f"  {r['error']}")
+        return "\n".join(lines)
@@ -0,0 +1,177 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bulk import TABLES, connect
+
+# 逐行触发器（表, 触发器名）；快速加载期间停用，加载后改为整表校验
+ROW_TRIGGERS = (
+    ("configuration", "trg_configuration_transmission_spec"),
+    ("vehicle", "trg_vehicle_transmission_matches_config"),
+)
+
+# 二级索引：非主键、非唯一、不属于任何约束（唯一约束与主键保留，外键和去重仍由数据库保证）
+# 按月分区表只取父表上的索引：删除时连同各分区的索引一起删除，重建时去掉 ON ONLY 以建到全部分区
+SECONDARY_INDEXES_SQL = """
+SELECT i.relname, replace(pg_get_indexdef(i.oid), ' ON ONLY ', ' ON ')
+FROM pg_index x
+JOIN pg_class i ON i.oid = x.indexrelid
+JOIN pg_class t ON t.oid = x.indrelid
+JOIN pg_namespace n ON n.oid = t.relnamespace
+WHERE n.nspname = current_schema()
+  AND NOT x.indisprimary
+  AND NOT x.indisunique
+  AND NOT i.relispartition
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.oid)
+ORDER BY i.relname
+"""
+
+_TRANSMISSION_SPECS = """
+SELECT ps.part_spec_id
+FROM carco.part_spec ps
+JOIN carco.part_category pc ON pc.category_id = ps.category_id
+WHERE lower(pc.name) = 'transmission'
+"""
+
+# 与触发器逐条对应的整表校验：每条查询返回违规行主键
+VALIDATION_RULES = (
+    (
+        "configuration.transmission_spec_id must be a Transmission part_spec",
+        f"""
+        SELECT c.config_id
+        FROM carco.configuration c
+        WHERE c.transmission_spec_id NOT IN ({_TRANSMISSION_SPECS})
+        """,
+    ),
+    (
+        "vehicle.transmission_unit_id not found",
+        """
+        SELECT v.vehicle_id
+        FROM carco.vehicle v
+        LEFT JOIN carco.transmission_unit tu ON tu.transmission_unit_id = v.transmission_unit_id
+        WHERE tu.transmission_unit_id IS NULL
+        """,
+    ),
+    (
+        "vehicle.transmission_unit_id is not a Transmission unit",
+        f"""
+        SELECT v.vehicle_id
+        FROM carco.vehicle v
+        JOIN carco.transmission_unit tu ON tu.transmission_unit_id = v.transmission_unit_id
+        WHERE tu.part_spec_id NOT IN ({_TRANSMISSION_SPECS})
+        """,
+    ),
+    (
+        "vehicle.transmission_unit spec does not match configuration",
+        """
+        SELECT v.vehicle_id
+        FROM carco.vehicle v
+        JOIN carco.transmission_unit tu ON tu.transmission_unit_id = v.transmission_unit_id
+        LEFT JOIN carco.configuration c ON c.config_id = v.config_id
+        WHERE c.transmission_spec_id IS DISTINCT FROM tu.part_spec_id
+        """,
+    ),
+)
+
+
+# 停用记录：删除的索引定义，至多一行。与 DROP INDEX、停用触发器同一事务提交，复原后删除；
+# 运行中途失败（或进程被终止）时保持停用并留下记录，下一次运行开始前据此复原（见 abandon_suspended）
+SUSPENSION_DDL = """
+CREATE TABLE IF NOT EXISTS carco.data_init_fast_load (
+  index_defs   TEXT NOT NULL,
+  suspended_at TIMESTAMP NOT NULL DEFAULT now()
+)
+"""
+
+
+def _create_index(dsn: str, schema: str, ddl: str):
+    # 重建可重复执行：上一次复原中途失败时已建好的索引跳过
+    conn = connect(dsn, schema)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(ddl.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class FastLoad:
+    # --fast-load：加载前停用逐行触发器、删除二级索引；提交前整表校验，提交后并行重建索引、启用触发器并 ANALYZE
+    def __init__(self, dsn: str, conn, index_defs: list | None = None):
+        self.dsn = dsn
+        self.conn = conn
+        self.index_defs: list[tuple[str, str]] = [tuple(d) for d in index_defs or []]
+        self.suspended = index_defs is not None
+
+    @classmethod
+    def pending(cls, dsn: str, conn) -> "FastLoad | None":
+        # 之前的运行留下的停用状态；没有时返回 None
+        with conn.cursor() as cur:
+            cur.execute(SUSPENSION_DDL)
+            cur.execute("SELECT index_defs FROM carco.data_init_fast_load")
+            row = cur.fetchone()
+        conn.commit()
+        return None if row is None else cls(dsn, conn, json.loads(row[0]))
+
+    def suspend(self):
+        with self.conn.cursor() as cur:
+            cur.execute(SUSPENSION_DDL)
+            cur.execute(SECONDARY_INDEXES_SQL)
+            self.index_defs = cur.fetchall()
+            for table, trigger in ROW_TRIGGERS:
+                cur.execute(f"ALTER TABLE carco.{table} DISABLE TRIGGER {trigger}")
+            for name, _ in self.index_defs:
+                cur.execute(f"DROP INDEX carco.{name}")
+            cur.execute("INSERT INTO carco.data_init_fast_load(index_defs) VALUES (%s)", (json.dumps(self.index_defs),))
+        self.conn.commit()
+        self.suspended = True
+        print(f"fast-load: 已停用 {len(ROW_TRIGGERS)} 个触发器，删除 {len(self.index_defs)} 个二级索引")
+
+    def restore(self):
+        # 每个索引一个连接并行构建；只在加载完成、校验失败或放弃遗留状态时调用，调用时本连接不在事务中
+        if not self.suspended:
+            return
+        if self.index_defs:
+            with ThreadPoolExecutor(max_workers=min(len(self.index_defs), os.cpu_count() or 1)) as ex:
+                for fut in [ex.submit(_create_index, self.dsn, self.conn.schema, ddl) for _, ddl in self.index_defs]:
+                    fut.result()
+        with self.conn.cursor() as cur:
+            for table, trigger in ROW_TRIGGERS:
+                cur.execute(f"ALTER TABLE carco.{table} ENABLE TRIGGER {trigger}")
+            cur.execute("DELETE FROM carco.data_init_fast_load")
+        self.conn.commit()
+        self.suspended = False
+
+    def validate(self) -> list[str]:
+        # 在加载事务内、提交之前执行，返回违规说明；不提交也不回滚，由调用方决定
+        failures = []
+        with self.conn.cursor() as cur:
+            for message, sql in VALIDATION_RULES:
+                cur.execute(f"SELECT count(*), (array_agg(id ORDER BY id))[1:5] FROM ({sql}) bad(id)")
+                count, sample = cur.fetchone()
+                if count:
+                    failures.append(f"{message}: {count} 行（如 {sample}）")
+        return failures
+
+    def analyze(self):
+        autocommit = self.conn.autocommit
+        self.conn.autocommit = True
+        try:
+            with self.conn.cursor() as cur:
+                for table in TABLES:
+                    cur.execute(f"ANALYZE carco.{table}")
+        finally:
+            self.conn.autocommit = autocommit
+
+    def finish(self):
+        self.restore()
+        self.analyze()
+        print(f"fast-load: 已重建 {len(self.index_defs)} 个索引，已 ANALYZE")
+
+
+def abandon_suspended(dsn: str, conn):
+    # 开始加载前：之前的 --fast-load 运行中途失败、仍停用着触发器与索引时先复原
+    fast = FastLoad.pending(dsn, conn)
+    if fast is not None:
+        fast.restore()
+        print(f"fast-load: 上一次运行遗留的停用状态已复原（重建 {len(fast.index_defs)} 个索引）")
@@ -0,0 +1,320 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+import numpy as np
+
+from identifiers import serials, vins
+from names import NamePool
+from rollup import Rollup, months
+from samplers import AliasTable, SaleDateSampler, ZipfKeys, biased_days, block_generator, random_days, sale_prices
+
+
+# 生成阶段所需的全部维度信息；维度写入后一次性构建，之后只在进程内查表
+@dataclass
+class Catalog:
+    model_spec: dict[int, int]
+    model_brand: dict[int, int]
+    model_name: dict[int, str]
+    model_price_base: dict[int, float]
+    configs_per_model: dict[int, list[int]]
+    config_spec: dict[int, int]
+    brand_sell_mult: dict[int, float]
+    model_sell_boost_name: dict[str, float]
+    color_ids: list[int]
+    dealer_ids: list[int]
+    dealer_speed: dict[int, float]
+    spec_to_supplier: dict[int, int]
+    spec_prefix: dict[int, str]
+    recall_supplier_id: int
+    # 以下取自场景文件（见 scenario.py）
+    customer_cities: list[str]
+    gender_weights: dict[str, float]
+    income_buckets: list[float]
+    income_weights: list[float]
+    # 生产/入库日期区间与售出日期上限
+    date_start: date
+    date_end: date
+    sale_cap: date
+    # 售出概率（基础, 上限）与售价（浮动, 高配占比, 高配上浮）
+    sale_prob: tuple[float, float]
+    sale_price: tuple[float, float, float]
+    month_weights: dict[int, float]
+    sale_boosts: dict[tuple[int, int, str], float]
+    # 召回供应商的单元按比例集中在召回区间内生产
+    recall_window: tuple[date, date]
+    recall_share: float
+    # 变速器单元总量/车辆数、每规格下限、召回供应商备货倍数
+    unit_pool: tuple[float, int, float]
+    # 热点分布（场景 [skew] 与经销商/车型的 weight，见 samplers.skew_weights）：None / 0 为均匀
+    dealer_weights: list[float] | None = None
+    model_weights: dict[int, float] | None = None
+    customer_skew: float = 0.0
+
+
+# 生成作业：各分片只依赖这些参数与自身键区间，与分片数量无关
+@dataclass
+class GenJob:
+    catalog: Catalog
+    seed: int
+    bases: dict[str, int]
+    customers: int
+    spare_counts: dict[int, int] = field(default_factory=dict)
+    vin_check_digit: bool = False
+    # 客户姓名来源：pool（内置加权姓名池，整列抽取）或 faker（可选依赖，逐行生成）
+    name_source: str = "pool"
+    # 生成车辆时同时累加预聚合汇总（见 rollup.py）
+    rollups: bool = True
+    # 生产/入库日期区间与售出日期上限；None 取场景的区间，追加模式下为新的时间段
+    date_start: date | None = None
+    date_end: date | None = None
+    sale_cap: date | None = None
+
+
+# 随机数按固定大小的键块派生：块号即计数器，(seed, 流, 块号) 决定该块全部随机数
+BLOCK_SIZE = 4096
+
+_fake = None
+
+
+def chunk_ranges(n: int, chunk_size: int):
+    # 按块对齐把 [0, n) 切成定长分片（向上取整到 BLOCK_SIZE 的倍数）；切分方式不影响生成结果
+    step = max(1, -(-chunk_size // BLOCK_SIZE)) * BLOCK_SIZE
+    for start in range(0, n, step):
+        yield start, min(n, start + step)
+
+
+def _blocks(seed: int, stream: str, start: int, stop: int):
+    for b in range(start // BLOCK_SIZE, -(-stop // BLOCK_SIZE)):
+        lo, hi = max(start, b * BLOCK_SIZE), min(stop, (b + 1) * BLOCK_SIZE)
+        yield block_generator(seed, stream, b), np.arange(lo, hi)
+
+
+def _faker_names(rng: np.random.Generator, n: int) -> list[str]:
+    global _fake
+    if _fake is None:
+        try:
+            from faker import Faker
+        except ImportError:
+            raise SystemExit("--name-source faker 需要 Faker：pip install -r requirements-faker.txt")
+        _fake = Faker("zh_CN")
+    _fake.seed_instance(int(rng.integers(2**63)))
+    return [_fake.name() for _ in range(n)]
+
+
+def unit_pool_sizes(catalog: Catalog, vehicles: int) -> dict[int, int]:
+    # 各规格变速器单元总量：召回供应商产量略高，确保有足够召回区间样本
+    specs = list(dict.fromkeys(catalog.model_spec.values()))
+    ratio, minimum, recall_mult = catalog.unit_pool
+    total_units = int(vehicles * ratio)
+    base = max(minimum, total_units // len(specs))
+    return {
+        sid: int(base * recall_mult) if catalog.spec_to_supplier[sid] == catalog.recall_supplier_id else base
+        for sid in specs
+    }
+
+
+# 维度查找表的数组形式，每个分片构建一次
+class CatalogTables:
+    def __init__(self, job: GenJob):
+        catalog = job.catalog
+        self.date_start = job.date_start or catalog.date_start
+        self.date_end = job.date_end or catalog.date_end
+        self.sale_cap = job.sale_cap or catalog.sale_cap
+        # 召回区间不在本次日期区间内时不再集中投放
+        self.recall_window = catalog.recall_window
+        overlaps = self.recall_window[0] <= self.date_end and self.date_start <= self.recall_window[1]
+        self.recall_share = catalog.recall_share if overlaps else 0.0
+        self.model_ids = np.array(list(catalog.configs_per_model.keys()))
+        self.model_brand = np.array([catalog.model_brand[m] for m in self.model_ids])
+        n_models = len(self.model_ids)
+        max_cfg = max(len(c) for c in catalog.configs_per_model.values())
+        self.n_configs = np.array([len(catalog.configs_per_model[m]) for m in self.model_ids])
+        self.config_ids = np.zeros((n_models, max_cfg), dtype=np.int64)
+        for i, m in enumerate(self.model_ids):
+            self.config_ids[i, :len(catalog.configs_per_model[m])] = catalog.configs_per_model[m]
+        self.spec_ids = np.array(list(dict.fromkeys(catalog.model_spec.values())))
+        spec_pos = {sid: i for i, sid in enumerate(self.spec_ids)}
+        self.config_spec_idx = np.vectorize(lambda c: spec_pos.get(catalog.config_spec.get(int(c)), 0))(self.config_ids)
+        self.spec_supplier = np.array([catalog.spec_to_supplier[sid] for sid in self.spec_ids])
+        self.spec_biased = self.spec_supplier == catalog.recall_supplier_id
+        self.spec_prefix = [catalog.spec_prefix[sid] for sid in self.spec_ids]
+
+        # 销售概率：基础 × 品牌倾向 × 车型倾向
+        base_prob, max_prob = catalog.sale_prob
+        self.sold_prob = np.array([
+            min(max_prob, base_prob * catalog.brand_sell_mult.get(catalog.model_brand[m], 1.0)
+                * catalog.model_sell_boost_name.get(catalog.model_name[m], 1.0))
+            for m in self.model_ids
+        ])
+        self.price_base = np.array([catalog.model_price_base.get(m, 120000.0) for m in self.model_ids])
+        self.sale_price = catalog.sale_price
+        self.color_ids = np.array(catalog.color_ids)
+        self.dealer_ids = np.array(catalog.dealer_ids)
+        self.dealer_speed = np.array([catalog.dealer_speed.get(d, 1.0) for d in catalog.dealer_ids])
+        # 热点经销商/车型/客户：未配置时整列均匀抽取，随机序列与未引入热点分布前一致
+        self.dealer_table = AliasTable(catalog.dealer_weights) if catalog.dealer_weights else None
+        self.model_table = AliasTable([catalog.model_weights[m] for m in self.model_ids.tolist()]) if catalog.model_weights else None
+        self.customer_keys = ZipfKeys(job.customers, catalog.customer_skew) if catalog.customer_skew and job.customers else None
+        dealer_p = np.asarray(catalog.dealer_weights or np.ones(len(self.dealer_ids)), dtype=np.float64)
+        self.dealer_p = dealer_p / dealer_p.sum()
+
+        model_pos = {catalog.model_name[m]: i for i, m in enumerate(self.model_ids)}
+        boosts = {(y, m, model_pos[name]): f for (y, m, name), f in catalog.sale_boosts.items() if name in model_pos}
+        self.sale_dates = SaleDateSampler(self.date_start, self.sale_cap, catalog.month_weights, boosts, n_models, self.sale_cap)
+
+    def sample_models(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.model_table.sample(rng, n) if self.model_table is not None else rng.integers(0, len(self.model_ids), n)
+
+    def sample_dealers(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        return self.dealer_table.sample(rng, n) if self.dealer_table is not None else rng.integers(0, len(self.dealer_ids), n)
+
+    def sample_customers(self, rng: np.random.Generator, n: int, customers: int) -> np.ndarray:
+        # 0 起的客户键偏移
+        return self.customer_keys.sample(rng, n) if self.customer_keys is not None else rng.integers(0, customers, n)
+
+    def production_dates(self, rng: np.random.Generator, spec_idx: np.ndarray) -> np.ndarray:
+        return biased_days(rng, self.spec_biased[spec_idx], self.recall_share, self.recall_window, (self.date_start, self.date_end))
+
+    def serials(self, unit_ids: np.ndarray, spec_idx: np.ndarray) -> list[str]:
+        return serials(unit_ids, [self.spec_prefix[i] for i in spec_idx.tolist()])
+
+
+def _dates(arr: np.ndarray) -> list:
+    return arr.astype(object).tolist()
+
+
+def generate_customers(job: GenJob, start: int, stop: int) -> list[tuple]:
+    pool = NamePool() if job.name_source == "pool" else None
+    catalog = job.catalog
+    genders = AliasTable(list(catalog.gender_weights.values()))
+    gender_codes = np.array(list(catalog.gender_weights.keys()))
+    incomes = AliasTable(catalog.income_weights)
+    income_values = np.array(catalog.income_buckets, dtype=np.float64) * 10000
+    cities = np.array(catalog.customer_cities)
+    rows = []
+    for rng, keys in _blocks(job.seed, "customer", start, stop):
+        n = len(keys)
+        gender = gender_codes[genders.sample(rng, n)]
+        names = pool.sample(rng, gender).tolist() if pool is not None else _faker_names(rng, n)
+        rows.extend(zip(
+            (keys + job.bases["customer"]).tolist(),
+            names,
+            gender.tolist(),
+            income_values[incomes.sample(rng, n)].tolist(),
+            cities[rng.integers(0, len(cities), n)].tolist(),
+        ))
+    return rows
+
+
+def generate_vehicles(job: GenJob, start: int, stop: int) -> tuple[dict[str, list[tuple]], dict[int, int], dict]:
+    # 每辆车随车生成一台匹配规格的变速器单元（主键 = 单元区间起点 + 车辆序号），无需共享单元池
+    t = CatalogTables(job)
+    rollup = Rollup() if job.rollups else None
+    rows: dict[str, list[tuple]] = {"transmission_unit": [], "vehicle": [], "inventory_assignment": [], "sale": []}
+    demand = np.zeros(len(t.spec_ids), dtype=np.int64)
+    for rng, keys in _blocks(job.seed, "vehicle", start, stop):
+        n = len(keys)
+        model_idx = t.sample_models(rng, n)
+        cfg_pos = (rng.random(n) * t.n_configs[model_idx]).astype(np.int64)
+        config_ids = t.config_ids[model_idx, cfg_pos]
+        spec_idx = t.config_spec_idx[model_idx, cfg_pos]
+        demand += np.bincount(spec_idx, minlength=len(t.spec_ids))
+
+        tu_keys = keys + job.bases["transmission_unit"]
+        tu_ids = tu_keys.tolist()
+        produced = t.production_dates(rng, spec_idx)
+        rows["transmission_unit"].extend(zip(
+            tu_ids,
+            t.spec_ids[spec_idx].tolist(),
+            t.spec_supplier[spec_idx].tolist(),
+            t.serials(tu_keys, spec_idx),
+            _dates(produced),
+        ))
+
+        vid_keys = keys + job.bases["vehicle"]
+        vids = vid_keys.tolist()
+        mdate = random_days(rng, t.date_start, t.date_end, n)
+        rows["vehicle"].extend(zip(
+            vids,
+            vins(rng, vid_keys, job.vin_check_digit).tolist(),
+            t.model_ids[model_idx].tolist(),
+            config_ids.tolist(),
+            t.color_ids[rng.integers(0, len(t.color_ids), n)].tolist(),
+            tu_ids,
+            _dates(mdate),
+        ))
+
+        dealer_idx = t.sample_dealers(rng, n)
+        received_at = np.minimum(mdate + rng.integers(0, 31, n), np.datetime64(t.sale_cap, "D"))
+        rows["inventory_assignment"].extend(zip(vids, t.dealer_ids[dealer_idx].tolist(), _dates(received_at)))
+
+        # 售出车辆：按经销商速度和月份权重生成售出日期，售价以车型基准价浮动、部分高配上浮（见场景 [sales]）
+        # 截止日当天入库的车辆不再售出
+        sold = np.flatnonzero((rng.random(n) < t.sold_prob[model_idx]) & (received_at < np.datetime64(t.sale_cap, "D")))
+        m = len(sold)
+        sale_dates = t.sale_dates.sample(rng, received_at[sold], model_idx[sold], t.dealer_speed[dealer_idx[sold]])
+        prices = sale_prices(rng, t.price_base[model_idx[sold]], *t.sale_price)
+        # 销售主键与车辆序号一一对应（未售车辆留空号），保证与分片方式无关
+        rows["sale"].extend(zip(
+            (keys[sold] + job.bases["sale"]).tolist(),
+            (keys[sold] + job.bases["vehicle"]).tolist(),
+            t.dealer_ids[dealer_idx[sold]].tolist(),
+            (t.sample_customers(rng, m, job.customers) + job.bases["customer"]).tolist(),
+            _dates(sale_dates),
+            prices.tolist(),
+        ))
+
+        if rollup is not None:
+            sold_models = model_idx[sold]
+            sold_dealers = dealer_idx[sold]
+            sale_month = months(sale_dates)
+            rollup.add(
+                "rollup_sales_monthly",
+                [sale_month, t.model_brand[sold_models], t.model_ids[sold_models]],
+                [np.ones(m), np.round(prices * 100)],
+            )
+            rollup.add(
+                "rollup_dealer_dwell",
+                [t.dealer_ids[sold_dealers], sale_month],
+                [np.ones(m), (sale_dates - received_at[sold]).astype(np.int64)],
+            )
+            is_sold = np.zeros(n)
+            is_sold[sold] = 1
+            rollup.add(
+                "rollup_recall_hits",
+                [t.spec_supplier[spec_idx], t.spec_ids[spec_idx], t.model_ids[model_idx], months(produced)],
+                [np.ones(n), is_sold],
+            )
+    summary = rollup.to_json() if rollup is not None else None
+    return rows, dict(zip(t.spec_ids.tolist(), demand.tolist())), summary
+
+
+def generate_spare_units(job: GenJob, start: int, stop: int) -> list[tuple]:
+    # 未装车的库存单元：补足各规格总量，键空间按规格顺序拼接
+    t = CatalogTables(job)
+    spec_pos = {sid: i for i, sid in enumerate(t.spec_ids.tolist())}
+    bounds = np.cumsum(list(job.spare_counts.values()))
+    order = np.array([spec_pos[sid] for sid in job.spare_counts])
+    rows = []
+    for rng, keys in _blocks(job.seed, "spare_unit", start, stop):
+        spec_idx = order[np.searchsorted(bounds, keys, side="right")]
+        unit_keys = keys + job.bases["spare_unit"]
+        rows.extend(zip(
+            unit_keys.tolist(),
+            t.spec_ids[spec_idx].tolist(),
+            t.spec_supplier[spec_idx].tolist(),
+            t.serials(unit_keys, spec_idx),
+            _dates(t.production_dates(rng, spec_idx)),
+        ))
+    return rows
+
+
+def generate_shard(job: GenJob, kind: str, start: int, stop: int) -> tuple[dict[str, list[tuple]], dict[int, int], dict | None]:
+    # 返回 (各表行, 各规格装车数, 汇总增量)；汇总增量仅车辆分片有，未启用汇总时为 None
+    if kind == "customer":
+        return {"customer": generate_customers(job, start, stop)}, {}, {}
+    if kind == "vehicle":
+        return generate_vehicles(job, start, stop)
+    if kind == "spare_unit":
+        return {"transmission_unit": generate_spare_units(job, start, stop)}, {}, {}
+    raise ValueError(f"unknown shard kind: {kind}")
@@ -0,0 +1,75 @@
+import numpy as np
+
+from samplers import SERIAL_ALPHABET, VIN_ALPHABET, random_codes
+
+# VIN/序列号由主键经固定密钥的 Feistel 置换后编码得到：置换是双射，主键唯一则编码唯一，
+# 无需逐行查重；密钥固定（与 --seed 无关），多次追加写入同一数据库也不会撞号
+_ROUND_KEYS = (0x3C6EF372FE94F82B, 0xA54FF53A5F1D36F1, 0x510E527FADE682D1, 0x9B05688C2B3E6C1F)
+
+VIN_ID_BITS = 40  # 33^8 ≥ 2^40：VIN 第 10~17 位可容纳约 1.1 万亿个主键
+SERIAL_ID_BITS = 50  # 36^10 ≥ 2^50：序列号后 10 位可容纳约 1125 万亿个主键
+
+# ISO 3779 校验位：字母换算值与各位权重
+_VIN_VALUES = {**{str(d): d for d in range(10)}, **dict(zip("ABCDEFGH", range(1, 9))), **dict(zip("JKLMN", range(1, 6))),
+               "P": 7, "R": 9, **dict(zip("STUVWXYZ", range(2, 10)))}
+_VIN_WEIGHTS = np.array([8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def _mix(r: np.ndarray, key: int) -> np.ndarray:
+    h = (r + np.uint64(key)) * np.uint64(0x9E3779B97F4A7C15)
+    h ^= h >> np.uint64(29)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(32)
+    return h
+
+
+def feistel(x: np.ndarray, bits: int) -> np.ndarray:
+    # [0, 2^bits) 上的平衡 Feistel 置换（bits 为偶数）
+    half = np.uint64(bits // 2)
+    mask = np.uint64((1 << (bits // 2)) - 1)
+    x = np.asarray(x, dtype=np.uint64)
+    if len(x) and int(x.max()) >> bits:
+        raise ValueError(f"identifier space exhausted: key {int(x.max())} needs more than {bits} bits")
+    left, right = x >> half, x & mask
+    for key in _ROUND_KEYS:
+        left, right = right, left ^ (_mix(right, key) & mask)
+    return (left << half) | right
+
+
+def encode(values: np.ndarray, alphabet: str, width: int) -> np.ndarray:
+    # 定长进制编码（高位在前），返回 U{width} 数组
+    chars = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+    base = np.uint64(len(chars))
+    v = np.asarray(values, dtype=np.uint64).copy()
+    digits = np.empty((len(v), width), dtype=np.uint8)
+    for pos in range(width - 1, -1, -1):
+        digits[:, pos] = chars[(v % base).astype(np.int64)]
+        v //= base
+    return digits.view(f"S{width}").ravel().astype(f"U{width}")
+
+
+def vin_check_digits(vins: np.ndarray) -> np.ndarray:
+    # 第 9 位校验位：各位换算值加权和 mod 11，10 记为 X
+    table = np.zeros(128, dtype=np.int64)
+    for ch, val in _VIN_VALUES.items():
+        table[ord(ch)] = val
+    codes = vins.astype("S17").view(np.uint8).reshape(len(vins), 17)
+    rem = (table[codes] * _VIN_WEIGHTS).sum(axis=1) % 11
+    return np.where(rem == 10, "X", rem.astype(str))
+
+
+def vins(rng: np.random.Generator, ids: np.ndarray, check_digit: bool = False) -> np.ndarray:
+    # 第 1~9 位随机（可选第 9 位为合法校验位），第 10~17 位为置换后的主键
+    prefix = random_codes(rng, VIN_ALPHABET, len(ids), 9)
+    out = np.char.add(prefix, encode(feistel(ids, VIN_ID_BITS), VIN_ALPHABET, 8))
+    if check_digit and len(out):
+        raw = out.astype("S17").view(np.uint8).reshape(len(out), 17)
+        raw[:, 8] = np.frombuffer(vin_check_digits(out).astype("S1"), dtype=np.uint8)
+        out = raw.view("S17").ravel().astype("U17")
+    return out
+
+
+def serials(ids: np.ndarray, prefixes: list[str]) -> list[str]:
+    # <规格前缀>-<置换后主键的 10 位 base36>，同一主键在任何规格下都不会复用
+    suffixes = encode(feistel(ids, SERIAL_ID_BITS), SERIAL_ALPHABET, 10)
+    return [f"{p}-{s}" for p, s in zip(prefixes, suffixes.tolist())]
@@ -0,0 +1,48 @@
+import numpy as np
+
+from samplers import AliasTable
+
+# 常见姓氏及大致人口占比（%），含少量复姓
+SURNAMES = {
+    "王": 7.1, "李": 6.8, "张": 6.2, "刘": 5.4, "陈": 4.6, "杨": 3.1, "黄": 2.0, "赵": 2.0, "吴": 1.9, "周": 1.9,
+    "徐": 1.5, "孙": 1.5, "马": 1.3, "朱": 1.3, "胡": 1.2, "郭": 1.2, "何": 1.1, "林": 1.0, "高": 1.0, "罗": 1.0,
+    "郑": 0.9, "梁": 0.9, "谢": 0.8, "宋": 0.7, "唐": 0.7, "许": 0.7, "邓": 0.6, "韩": 0.6, "冯": 0.6, "曹": 0.6,
+    "彭": 0.5, "曾": 0.5, "肖": 0.5, "田": 0.5, "董": 0.5, "潘": 0.4, "袁": 0.4, "蔡": 0.4, "蒋": 0.4, "余": 0.4,
+    "于": 0.4, "杜": 0.4, "叶": 0.4, "程": 0.4, "魏": 0.4, "苏": 0.3, "吕": 0.3, "丁": 0.3, "任": 0.3, "卢": 0.3,
+    "姚": 0.3, "沈": 0.3, "钟": 0.3, "姜": 0.3, "崔": 0.3, "谭": 0.3, "陆": 0.2, "范": 0.2, "汪": 0.2, "廖": 0.2,
+    "石": 0.2, "金": 0.2, "韦": 0.2, "贾": 0.2, "夏": 0.2, "付": 0.2, "方": 0.2, "邹": 0.2, "熊": 0.2, "白": 0.2,
+    "孟": 0.2, "秦": 0.2, "邱": 0.2, "侯": 0.2, "江": 0.2, "尹": 0.2, "薛": 0.2, "闫": 0.2, "段": 0.2, "雷": 0.2,
+    "龙": 0.1, "黎": 0.1, "史": 0.1, "陶": 0.1, "贺": 0.1, "毛": 0.1, "郝": 0.1, "顾": 0.1, "龚": 0.1, "邵": 0.1,
+    "万": 0.1, "钱": 0.1, "戴": 0.1, "严": 0.1, "孔": 0.1, "欧阳": 0.02, "司马": 0.01, "上官": 0.01, "诸葛": 0.01,
+}
+
+# 名字用字按常用程度排序，权重随排名递减；男女各一组
+GIVEN_CHARS = {
+    "M": "伟强磊军洋勇杰涛明超斌刚辉鹏浩宇俊峰建华志文国平鑫波亮飞宁凯晨轩博然睿泽昊哲子豪毅航鸿锋坤诚晓东海林",
+    "F": "芳娜敏静丽艳娟霞秀玲婷雪慧琳颖倩欣怡萱佳梦雨晴月璐瑶晶洁燕丹红萍彤妍琪悦薇诗涵思璇嘉宁婉馨蕾晓兰",
+}
+# 双字名占比
+TWO_CHAR_SHARE = 0.75
+
+
+def _rank_weights(n: int) -> np.ndarray:
+    return 1.0 / (np.arange(n) + 8.0)
+
+
+# 预构建的姓名池：每个分片按块整列抽取，代替逐行 Faker().name()
+class NamePool:
+    def __init__(self):
+        self.surnames = np.array(list(SURNAMES))
+        self.surname_table = AliasTable(list(SURNAMES.values()))
+        self.chars = {g: np.array(list(chars)) for g, chars in GIVEN_CHARS.items()}
+        self.char_tables = {g: AliasTable(_rank_weights(len(chars))) for g, chars in GIVEN_CHARS.items()}
+
+    def sample(self, rng: np.random.Generator, genders: np.ndarray) -> np.ndarray:
+        n = len(genders)
+        names = self.surnames[self.surname_table.sample(rng, n)]
+        given = []
+        for _ in range(2):
+            pos = {g: self.char_tables[g].sample(rng, n) for g in self.chars}
+            given.append(np.where(genders == "M", self.chars["M"][pos["M"]], self.chars["F"][pos["F"]]))
+        second = np.where(rng.random(n) < TWO_CHAR_SHARE, given[1], "")
+        return np.char.add(np.char.add(names, given[0]), second)
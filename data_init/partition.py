@@ -0,0 +1,154 @@
+import re
+from datetime import date
+
+from psycopg import errors
+
+from bulk import TABLES, copy_rows, load_dataset
+from swap import INIT_SQL
+
+# 按月分区（--partition-by-month）：sale 按 sale_date、inventory_assignment 按 received_at 做范围分区，
+# 每月一个叶子分区（sale_p202406）外加 DEFAULT 分区兜底。分区键须进入主键与唯一约束，
+# 故“每车至多一条销售/入库”由生成器保证，加载后整表校验（check_partitions）
+PARTITIONED = {"sale": "sale_date", "inventory_assignment": "received_at"}
+
+# 列定义与 sql/init.sql 一致；仅主键/唯一约束加上分区键
+PARTITIONED_DDL = """
+DROP TABLE carco.sale, carco.inventory_assignment CASCADE;
+
+CREATE TABLE carco.inventory_assignment (
+  vehicle_id     BIGINT NOT NULL REFERENCES carco.vehicle(vehicle_id),
+  dealer_id      BIGINT NOT NULL REFERENCES carco.dealer(dealer_id),
+  received_at    DATE NOT NULL,
+  PRIMARY KEY (vehicle_id, received_at)
+) PARTITION BY RANGE (received_at);
+
+CREATE TABLE carco.sale (
+  sale_id        BIGSERIAL,
+  vehicle_id     BIGINT NOT NULL REFERENCES carco.vehicle(vehicle_id),
+  dealer_id      BIGINT NOT NULL REFERENCES carco.dealer(dealer_id),
+  customer_id    BIGINT NOT NULL REFERENCES carco.customer(customer_id),
+  sale_date      DATE NOT NULL,
+  sale_price     NUMERIC(12,2) NOT NULL CHECK (sale_price > 0),
+  PRIMARY KEY (sale_id, sale_date),
+  UNIQUE (vehicle_id, sale_date)
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE carco.inventory_assignment_default PARTITION OF carco.inventory_assignment DEFAULT;
+CREATE TABLE carco.sale_default PARTITION OF carco.sale DEFAULT;
+"""
+
+# 两表上的二级索引与依赖它们的视图随 DROP ... CASCADE 一并删除，按 init.sql 原样重建（分区表上的索引自动建到每个分区）
+_INDEX = re.compile(r"CREATE INDEX \w+\s+ON carco\.(?:sale|inventory_assignment)\(.*?\);")
+_VIEW = re.compile(r"CREATE OR REPLACE VIEW .*?;", re.S)
+_LEAF = re.compile(r"_p\d{6}$")
+
+LEAVES_SQL = """
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_class p ON p.oid = i.inhparent
+JOIN pg_namespace n ON n.oid = p.relnamespace
+WHERE n.nspname = current_schema() AND p.relname IN ('sale', 'inventory_assignment')
+"""
+
+# 每车至多一条销售/入库（原表的 vehicle_id 唯一约束）
+UNIQUE_SQL = """
+SELECT
+  (SELECT count(*) FROM (SELECT vehicle_id FROM carco.sale GROUP BY vehicle_id HAVING count(*) > 1) d),
+  (SELECT count(*) FROM (SELECT vehicle_id FROM carco.inventory_assignment GROUP BY vehicle_id HAVING count(*) > 1) d)
+"""
+
+
+def is_partitioned(cur) -> bool:
+    cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = 'carco.sale'::regclass")
+    return cur.fetchone()[0]
+
+
+def partition_tables(conn):
+    # 把空的 sale/inventory_assignment 换成分区表；已是分区表时不做任何事（续跑、追加）
+    with conn.cursor() as cur:
+        if is_partitioned(cur):
+            return False
+        cur.execute("SELECT EXISTS (SELECT 1 FROM carco.sale) OR EXISTS (SELECT 1 FROM carco.inventory_assignment)")
+        if cur.fetchone()[0]:
+            raise SystemExit("--partition-by-month 需要空的 sale/inventory_assignment：配合 --reset 或 --swap 使用")
+        with open(INIT_SQL, encoding="utf-8") as f:
+            init_sql = f.read()
+        cur.execute(PARTITIONED_DDL)
+        for ddl in _INDEX.findall(init_sql) + _VIEW.findall(init_sql):
+            cur.execute(ddl)
+    conn.commit()
+    return True
+
+
+def leaf_name(table: str, year: int, month: int) -> str:
+    return f"{table}_p{year:04d}{month:02d}"
+
+
+# 建叶子分区时可预期的失败：DEFAULT 分区已有该月数据（如 --stream 写入）、与已有分区重叠或同名表已存在；其余错误（权限、锁超时等）照常抛出
+_SKIPPABLE = (errors.CheckViolation, errors.InvalidObjectDefinition, errors.DuplicateTable)
+
+
+def ensure_partitions(conn, start: date, end: date) -> int:
+    # 为 [start, end] 覆盖的每个月建叶子分区；可预期的失败只回滚到该分区的保存点并跳过，如 DEFAULT 已有该月数据时行继续留在 DEFAULT
+    with conn.cursor() as cur:
+        cur.execute(LEAVES_SQL)
+        leaves = {name for (name,) in cur.fetchall()}
+        created = 0
+        for index in range(start.year * 12 + start.month - 1, end.year * 12 + end.month):
+            lo = date(index // 12, index % 12 + 1, 1)
+            hi = date((index + 1) // 12, (index + 1) % 12 + 1, 1)
+            for table in PARTITIONED:
+                name = leaf_name(table, lo.year, lo.month)
+                if name in leaves:
+                    continue
+                try:
+                    # 已在事务中（上面的查询），conn.transaction() 为保存点
+                    with conn.transaction():
+                        cur.execute(f"CREATE TABLE carco.{name} PARTITION OF carco.{table} FOR VALUES FROM ('{lo}') TO ('{hi}')")
+                    created += 1
+                except _SKIPPABLE as e:
+                    print(f"跳过分区 {name}：{e}")
+    conn.commit()
+    return created
+
+
+def check_partitions(conn):
+    with conn.cursor() as cur:
+        cur.execute(UNIQUE_SQL)
+        sales, assignments = cur.fetchone()
+    conn.rollback()
+    if sales or assignments:
+        raise SystemExit(f"分区表校验失败：{sales} 辆车有多条销售，{assignments} 辆车有多条入库记录")
+    print("分区表校验通过（每车至多一条销售/入库）")
+
+
+def leaves(cur) -> set[str]:
+    cur.execute(LEAVES_SQL)
+    return {name for (name,) in cur.fetchall() if _LEAF.search(name)}
+
+
+def route(leaf_names: set[str], rows: dict[str, list[tuple]]) -> dict[str, tuple[str, list[tuple]]]:
+    # 入库/销售行在客户端按月路由到叶子分区（不经服务端逐行路由）：叶子分区（或父表）-> (表, 行)。
+    # 没有对应叶子分区的月份写入父表，由 DEFAULT 分区接收
+    groups: dict[str, tuple[str, list[tuple]]] = {}
+    for table, column in PARTITIONED.items():
+        pos = next(i for i, (c, _) in enumerate(TABLES[table]) if c == column)
+        for row in rows.get(table, ()):
+            day = row[pos]
+            name = leaf_name(table, day.year, day.month)
+            if name not in leaf_names:
+                name = table
+            groups.setdefault(name, (table, []))[1].append(row)
+    return groups
+
+
+def load_vehicle_shard(cur, rows: dict[str, list[tuple]], batch_size: int, fmt: str) -> dict[str, int]:
+    # 车辆分片：变速器单元与车辆照常 COPY，入库/销售按月直接 COPY 到叶子分区；全部在调用方的事务中，与分片登记一起提交
+    batch_size = max(1, batch_size)
+    counts = load_dataset(cur, {t: r for t, r in rows.items() if t not in PARTITIONED}, batch_size, fmt)
+    for name, (table, table_rows) in sorted(route(leaves(cur), rows).items()):
+        for start in range(0, len(table_rows), batch_size):
+            copy_rows(cur, table, table_rows[start:start + batch_size], fmt, into=name)
+    counts.update({table: len(rows.get(table, ())) for table in PARTITIONED})
+    return counts
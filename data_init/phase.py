@@ -0,0 +1,87 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from tqdm import tqdm
+
+from cache import cached_generate
+from generate import chunk_ranges
+from pipeline import run_pipeline
+from report import count_time
+
+# 按阶段（客户 → 车辆 → 变速器单元）逐分片生成并写出：续跑时跳过已提交的分片，
+# 单进程时走生产者/写入端流水线（见 pipeline.py），--workers > 1 时提交到进程池；各分片的规格需求、汇总增量与行数在此合并
+
+
+class PhaseRunner:
+    def __init__(self, report, args, ckpt, rollup, counts: dict[str, int], write_chunk, open_writer=None, close_writer=None, pool=None, shard_worker=None, cache=None):
+        self.report = report
+        self.chunk_size = args.chunk_size
+        self.queue_depth = args.queue_depth
+        self.writers = args.writers
+        self.workers = args.workers
+        self.ckpt = ckpt
+        self.rollup = rollup
+        self.counts = counts
+        # write_chunk(state, rows, kind, start, stop, demand, rollup) -> 各表行数；state 为写入线程自己的连接（open_writer 打开），单写入端时为 None
+        self.write_chunk = write_chunk
+        self.open_writer = open_writer
+        self.close_writer = close_writer
+        # 进程池与其中执行的 shard_worker(job, kind, start, stop)，后者返回 (规格需求, 汇总增量, 各表行数, 指标)
+        self.pool = pool
+        self.shard_worker = shard_worker
+        self.cache = cache
+
+    def run(self, desc: str, kind: str, n: int, job) -> dict[int, int]:
+        # 返回本阶段各规格的需求数
+        demand: dict[int, int] = {}
+        with self.report.stage(kind) as stage, tqdm(total=n, desc=desc) as bar:
+            ranges = []
+            for start, stop in chunk_ranges(n, self.chunk_size):
+                committed = None if self.ckpt is None else self.ckpt.committed(kind, start)
+                if committed is None:
+                    ranges.append((start, stop))
+                else:
+                    # 续跑时只累加已提交分片记录的规格需求与汇总增量
+                    self._merge(stage, demand, (*committed, {}, None))
+                    bar.update(stop - start)
+            results = self._pipelined(job, kind, ranges) if self.pool is None else self._pooled(job, kind, ranges)
+            for (start, stop), result in results:
+                self._merge(stage, demand, result)
+                bar.update(stop - start)
+        return demand
+
+    def _pipelined(self, job, kind: str, ranges: list[tuple[int, int]]):
+        # 生产者线程提前生成后续分片（至多 --queue-depth 个），写入端同时写入当前分片
+        def produce(key_range: tuple[int, int]):
+            with count_time("generate_seconds"):
+                return cached_generate(self.cache, job, kind, *key_range)
+
+        def consume(state, key_range: tuple[int, int], generated):
+            rows, chunk_demand, chunk_rollup = generated
+            chunk_counts = self.write_chunk(state, rows, kind, *key_range, chunk_demand, chunk_rollup)
+            return chunk_demand, chunk_rollup, chunk_counts, None
+
+        return run_pipeline(ranges, produce, consume, self.queue_depth, self.writers, self.open_writer, self.close_writer)
+
+    def _pooled(self, job, kind: str, ranges: list[tuple[int, int]]):
+        # 在途分片数有上限，父进程不积压任务
+        pending = {}
+        for key_range in ranges:
+            if len(pending) >= self.workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield pending.pop(fut), fut.result()
+            pending[self.pool.submit(self.shard_worker, job, kind, *key_range)] = key_range
+        for fut in wait(pending).done:
+            yield pending[fut], fut.result()
+
+    def _merge(self, stage: dict, demand: dict[int, int], result: tuple[dict[int, int], dict | None, dict[str, int], dict | None]):
+        chunk_demand, chunk_rollup, chunk_counts, metrics = result
+        if metrics:
+            self.report.add_worker(stage, metrics)
+        if self.rollup is not None and chunk_rollup:
+            self.rollup.merge(chunk_rollup)
+        for spec_id, count in chunk_demand.items():
+            demand[spec_id] = demand.get(spec_id, 0) + count
+        for table, count in chunk_counts.items():
+            self.counts[table] = self.counts.get(table, 0) + count
+            stage["rows"][table] = stage["rows"].get(table, 0) + count
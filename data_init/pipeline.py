@@ -0,0 +1,99 @@
+import queue
+import threading
+
+# 生产者/消费者流水线：生产者线程按顺序生成分片放入有界队列（至多 depth 个在途），写入端取出写入，
+# 生成（numpy 向量化、行元组构建）与 COPY/提交的网络和服务端耗时相互重叠；numpy 运算与 libpq 等待期间释放 GIL
+_END = object()
+
+
+class _Failed:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    # 有界队列上的可取消 put：下游失败或提前结束时生产者不会永久阻塞
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while True:
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return _END
+
+
+def run_pipeline(items, produce, consume, depth: int = 2, writers: int = 1, open_writer=None, close_writer=None):
+    # 生成器：produce(item) 在生产者线程中执行，consume(state, item, payload) 在写入端执行，按完成顺序产出 (item, consume 结果)。
+    # writers == 1 时在调用线程中写入（可直接使用调用方的连接）；> 1 时各写入线程用 open_writer() 打开自己的连接
+    tasks: queue.Queue = queue.Queue(maxsize=max(1, depth))
+    results: queue.Queue = queue.Queue()
+    stop = threading.Event()
+    writers = max(1, writers)
+
+    def producer():
+        try:
+            for item in items:
+                if stop.is_set() or not _put(tasks, (item, produce(item)), stop):
+                    return
+        except BaseException as e:
+            _put(tasks, _Failed(e), stop)
+        finally:
+            for _ in range(writers):
+                _put(tasks, _END, stop)
+
+    def writer():
+        state = None
+        try:
+            state = open_writer() if open_writer else None
+            while True:
+                task = _get(tasks, stop)
+                # 其他写入端失败或调用方提前结束后不再写入队列中剩余的分片
+                if task is _END or stop.is_set():
+                    break
+                if isinstance(task, _Failed):
+                    results.put(task)
+                    break
+                item, payload = task
+                results.put((item, consume(state, item, payload)))
+        except BaseException as e:
+            results.put(_Failed(e))
+        finally:
+            if close_writer and state is not None:
+                close_writer(state)
+            results.put(_END)
+
+    threads = [threading.Thread(target=producer, name="data-init-producer", daemon=True)]
+    if writers > 1:
+        threads += [threading.Thread(target=writer, name=f"data-init-writer-{i}", daemon=True) for i in range(writers)]
+    for t in threads:
+        t.start()
+    try:
+        if writers == 1:
+            while (task := tasks.get()) is not _END:
+                if isinstance(task, _Failed):
+                    raise task.error
+                item, payload = task
+                yield item, consume(None, item, payload)
+        else:
+            finished = 0
+            while finished < writers:
+                result = results.get()
+                if result is _END:
+                    finished += 1
+                elif isinstance(result, _Failed):
+                    raise result.error
+                else:
+                    yield result
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
@@ -0,0 +1,185 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# 进程内计数器：bulk.connect() 返回的连接/游标累加语句数、往返次数与等待数据库的时间，生成耗时由 count_time 累加
+# 阶段与分片各自取差值；--workers 下子进程把分片差值随结果返回，由父进程汇总。cache_hits/cache_misses 为数据集缓存（cache.py）的分片命中数
+COUNTER_KEYS = ("statements", "round_trips", "db_seconds", "generate_seconds", "cache_hits", "cache_misses")
+
+
+class Counters:
+    # 每个线程一份计数器，只由所属线程累加（各线程之间没有并发的读-改-写）；快照在锁内汇总全部线程。
+    # 因此 db_seconds / generate_seconds 是各线程时间之和（线程秒），多线程时可大于墙钟时间
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._threads: list[dict] = []
+
+    def _own(self) -> dict:
+        counters = getattr(self._local, "counters", None)
+        if counters is None:
+            counters = dict.fromkeys(COUNTER_KEYS, 0)
+            with self._lock:
+                self._threads.append(counters)
+            self._local.counters = counters
+        return counters
+
+    def add(self, key: str, value=1):
+        self._own()[key] += value
+
+    def isolate(self) -> dict:
+        # 当前线程此后累加到一份不计入快照的计数器并返回它：多目标灌数的目标线程按目标单独报告，不算到当时正在进行的阶段上
+        counters = dict.fromkeys(COUNTER_KEYS, 0)
+        self._local.counters = counters
+        return counters
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            threads = list(self._threads)
+        return {k: sum(c[k] for c in threads) for k in COUNTER_KEYS}
+
+
+COUNTERS = Counters()
+
+
+def counters_snapshot() -> dict:
+    return COUNTERS.snapshot()
+
+
+def counters_delta(before: dict) -> dict:
+    now = COUNTERS.snapshot()
+    return {k: now[k] - before[k] for k in COUNTER_KEYS}
+
+
+@contextmanager
+def count_time(key: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        COUNTERS.add(key, time.perf_counter() - started)
+
+
+@contextmanager
+def shard_metrics(metrics: dict):
+    # 工作进程中包住一个分片：结束时把计数器差值与分片耗时写入 metrics
+    before = counters_snapshot()
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.update(counters_delta(before), busy_seconds=time.perf_counter() - started)
+
+
+def peak_rss_bytes() -> dict[str, int | None]:
+    # 本进程与已回收子进程（--workers）的峰值常驻内存；Windows 无 resource 模块时为 None
+    try:
+        import resource
+    except ImportError:
+        return {"self": None, "children": None}
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+# 运行报告：按阶段记录耗时、写入行数、语句/往返次数、数据库等待与生成耗时（线程秒），结束时写成 JSON（--report）
+# 和/或 Prometheus textfile（--prometheus）
+class RunReport:
+    def __init__(self, meta: dict):
+        self.meta = meta
+        self.stages: list[dict] = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        entry = {"name": name, "seconds": 0.0, "rows": {}, "workers": {}}
+        before = counters_snapshot()
+        started = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = time.perf_counter() - started
+            own = counters_delta(before)
+            workers = entry.pop("workers")
+            for key in COUNTER_KEYS:
+                entry[key] = own[key] + workers.get(key, 0)
+            # --workers 下各子进程分片耗时之和（进程秒，可大于墙钟时间）；数据库与生成耗时同为线程/进程时间之和，不从墙钟时间中扣减
+            entry["busy_seconds"] = workers.get("busy_seconds", 0.0) if workers else None
+            total = sum(entry["rows"].values())
+            entry["rows_per_sec"] = total / entry["seconds"] if total and entry["seconds"] > 0 else None
+            entry["peak_rss_bytes"] = peak_rss_bytes()
+            self.stages.append(entry)
+
+    @staticmethod
+    def add_worker(entry: dict, metrics: dict):
+        for key, value in metrics.items():
+            entry["workers"][key] = entry["workers"].get(key, 0) + value
+
+    def to_dict(self) -> dict:
+        return {
+            **self.meta,
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "total_seconds": time.perf_counter() - self.started,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": self.stages,
+        }
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def write_prometheus(self, path: str):
+        # node_exporter textfile 约定：写临时文件后原子替换，避免采集到半个文件
+        data = self.to_dict()
+        target = data["target"]
+        lines = []
+
+        def metric(name: str, help_text: str, samples: list[tuple[dict, float]]):
+            lines.append(f"# HELP carco_data_init_{name} {help_text}")
+            lines.append(f"# TYPE carco_data_init_{name} gauge")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in {"target": target, **labels}.items())
+                lines.append(f"carco_data_init_{name}{{{label_str}}} {value}")
+
+        stages = data["stages"]
+        metric("success", "1 if the last run finished successfully", [({}, int(data["status"] == "ok"))])
+        metric("last_run_timestamp_seconds", "Unix time the last run finished", [({}, round(time.time(), 3))])
+        metric("total_seconds", "Wall time of the last run", [({}, round(data["total_seconds"], 6))])
+        metric("stage_seconds", "Wall time per stage", [({"stage": s["name"]}, round(s["seconds"], 6)) for s in stages])
+        metric("stage_rows", "Rows written per stage and table",
+               [({"stage": s["name"], "table": t}, n) for s in stages for t, n in s["rows"].items()])
+        metric("stage_statements", "SQL statements per stage", [({"stage": s["name"]}, s["statements"]) for s in stages])
+        metric("stage_round_trips", "Server round trips per stage", [({"stage": s["name"]}, s["round_trips"]) for s in stages])
+        metric("stage_db_seconds", "Thread-seconds waiting on the server per stage, summed over threads and processes",
+               [({"stage": s["name"]}, round(s["db_seconds"], 6)) for s in stages])
+        metric("stage_generate_seconds", "Thread-seconds spent generating rows per stage, summed over threads and processes",
+               [({"stage": s["name"]}, round(s["generate_seconds"], 6)) for s in stages])
+        metric("stage_cache_hits", "Shards served from the dataset cache per stage", [({"stage": s["name"]}, s["cache_hits"]) for s in stages])
+        metric("peak_rss_bytes", "Peak resident set size",
+               [({"process": p}, v) for p, v in data["peak_rss_bytes"].items() if v is not None])
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+    def summary(self) -> str:
+        # db / gen 为线程秒之和
+        rows = [f"{'stage':<18}{'seconds':>9}{'rows':>12}{'rows/s':>12}{'stmts':>9}{'trips':>9}{'db':>9}{'gen':>9}"]
+        for s in self.stages:
+            rate = f"{s['rows_per_sec']:,.0f}" if s["rows_per_sec"] else "-"
+            rows.append(
+                f"{s['name']:<18}{s['seconds']:>8.2f}s{sum(s['rows'].values()):>12,}{rate:>12}"
+                f"{s['statements']:>9,}{s['round_trips']:>9,}{s['db_seconds']:>8.2f}s{s['generate_seconds']:>8.2f}s"
+            )
+        rss = peak_rss_bytes()
+        peak = max((v for v in rss.values() if v is not None), default=None)
+        if peak is not None:
+            rows.append(f"peak RSS {peak / 2**20:,.0f} MiB")
+        return "\n".join(rows)
@@ -0,0 +1,179 @@
+import os
+import re
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+INIT_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "sql", "init.sql")
+
+# 预聚合汇总表：生成车辆时在内存中按键累加，运行结束时整表 COPY 写入（追加/续跑时与已有汇总相加），
+# 供后端代替对 v_sales_detail 等多表连接视图的逐次聚合。月份列为该月 1 日
+# 表结构只在 sql/init.sql 中维护；ensure_rollup_tables 为早于汇总表初始化的库按其中的定义补建
+_ROLLUP_DDL = re.compile(r"CREATE TABLE carco\.rollup_\w+ \(.*?\n\);", re.S)
+
+# 汇总表 -> (键列, 值列, 由原始表计算同一汇总的查询)
+# 销售按售出月；库存时长按售出月统计已售车辆（与 v_dealer_inventory_dwell 一致）；召回命中按变速器生产月统计已装车单元
+ROLLUPS = {
+    "rollup_sales_monthly": (
+        ("month", "brand_id", "model_id"),
+        ("units", "revenue"),
+        """
+        SELECT date_trunc('month', s.sale_date)::date, m.brand_id, v.model_id, count(*), sum(s.sale_price)
+        FROM carco.sale s
+        JOIN carco.vehicle v ON v.vehicle_id = s.vehicle_id
+        JOIN carco.model m ON m.model_id = v.model_id
+        GROUP BY 1, 2, 3
+        """,
+    ),
+    "rollup_dealer_dwell": (
+        ("dealer_id", "month"),
+        ("sold_units", "dwell_days"),
+        """
+        SELECT ia.dealer_id, date_trunc('month', s.sale_date)::date, count(*), sum(s.sale_date - ia.received_at)
+        FROM carco.inventory_assignment ia
+        JOIN carco.sale s ON s.vehicle_id = ia.vehicle_id
+        GROUP BY 1, 2
+        """,
+    ),
+    "rollup_recall_hits": (
+        ("supplier_id", "part_spec_id", "model_id", "month"),
+        ("units", "sold_units"),
+        """
+        SELECT tu.supplier_id, tu.part_spec_id, v.model_id, date_trunc('month', tu.production_date)::date, count(*), count(s.sale_id)
+        FROM carco.vehicle v
+        JOIN carco.transmission_unit tu ON tu.transmission_unit_id = v.transmission_unit_id
+        LEFT JOIN carco.sale s ON s.vehicle_id = v.vehicle_id
+        GROUP BY 1, 2, 3, 4
+        """,
+    ),
+}
+
+# 以分计的金额列：内存中按整数累加，写入时再换算为元，避免浮点误差
+_CENTS = {("rollup_sales_monthly", "revenue")}
+
+
+def ensure_rollup_tables(conn):
+    with open(INIT_SQL, encoding="utf-8") as f:
+        init_sql = f.read()
+    with conn.cursor() as cur:
+        for ddl in _ROLLUP_DDL.findall(init_sql):
+            cur.execute(ddl.replace("CREATE TABLE ", "CREATE TABLE IF NOT EXISTS ", 1))
+    conn.commit()
+
+
+def months(days: np.ndarray) -> np.ndarray:
+    # datetime64[D] -> 自 1970-01 起的月序号
+    return days.astype("datetime64[M]").astype(np.int64)
+
+
+class Rollup:
+    # 表名 -> {键元组: 各值列之和}；月份键为月序号，金额为分。可序列化为 JSON 随分片检查点保存
+    def __init__(self):
+        self.tables: dict[str, dict[tuple, list[int]]] = {table: {} for table in ROLLUPS}
+
+    def add(self, table: str, keys: list[np.ndarray], values: list[np.ndarray]):
+        if not len(keys[0]):
+            return
+        uniq, inv = np.unique(np.column_stack(keys), axis=0, return_inverse=True)
+        inv = inv.ravel()
+        sums = [np.bincount(inv, weights=v, minlength=len(uniq)).round().astype(np.int64).tolist() for v in values]
+        acc = self.tables[table]
+        for key, *vals in zip(map(tuple, uniq.tolist()), *sums):
+            total = acc.get(key)
+            if total is None:
+                acc[key] = vals
+            else:
+                for i, v in enumerate(vals):
+                    total[i] += v
+
+    def merge(self, partial: dict[str, list[list[int]]]):
+        for table, rows in partial.items():
+            n_keys = len(ROLLUPS[table][0])
+            acc = self.tables[table]
+            for row in rows:
+                key, vals = tuple(row[:n_keys]), row[n_keys:]
+                total = acc.get(key)
+                if total is None:
+                    acc[key] = list(vals)
+                else:
+                    for i, v in enumerate(vals):
+                        total[i] += v
+
+    def to_json(self) -> dict[str, list[list[int]]]:
+        return {table: [[*key, *vals] for key, vals in acc.items()] for table, acc in self.tables.items() if acc}
+
+    def rows(self, table: str) -> list[tuple]:
+        # 写入用的行：月序号转日期，分转元
+        key_cols, value_cols, _ = ROLLUPS[table]
+        month_pos = [i for i, c in enumerate(key_cols) if c == "month"]
+        cents = [(table, c) in _CENTS for c in value_cols]
+        out = []
+        for key, vals in self.tables[table].items():
+            key = list(key)
+            for i in month_pos:
+                key[i] = date(1970 + key[i] // 12, key[i] % 12 + 1, 1)
+            out.append((*key, *(Decimal(v).scaleb(-2) if c else v for v, c in zip(vals, cents))))
+        return out
+
+
+def load_rollups(cur, rollup: Rollup, fmt: str = "binary") -> dict[str, int]:
+    # 先 COPY 到同名临时表，再与已有汇总按键相加（更新已有键、插入新键），追加运行也保持一致
+    from bulk import copy_rows
+
+    counts = {}
+    for table, (key_cols, value_cols, _) in ROLLUPS.items():
+        rows = rollup.rows(table)
+        counts[table] = len(rows)
+        if not rows:
+            continue
+        cur.execute(f"CREATE TEMP TABLE {table} (LIKE carco.{table}) ON COMMIT DROP")
+        copy_rows(cur, table, rows, fmt, schema="pg_temp")
+        match = " AND ".join(f"t.{c} = s.{c}" for c in key_cols)
+        cur.execute(
+            f"UPDATE carco.{table} t SET {', '.join(f'{c} = t.{c} + s.{c}' for c in value_cols)}"
+            f" FROM pg_temp.{table} s WHERE {match}"
+        )
+        cur.execute(
+            f"INSERT INTO carco.{table} SELECT s.* FROM pg_temp.{table} s"
+            f" WHERE NOT EXISTS (SELECT 1 FROM carco.{table} t WHERE {match})"
+        )
+    return counts
+
+
+def _diff_sql(table: str) -> str:
+    key_cols, value_cols, source = ROLLUPS[table]
+    cols = ", ".join((*key_cols, *value_cols))
+    stored = f"SELECT {cols} FROM carco.{table}"
+    return f"(SELECT count(*) FROM ((({source}) EXCEPT ALL ({stored})) UNION ALL (({stored}) EXCEPT ALL ({source}))) d)"
+
+
+# 一条查询同时比对全部汇总表与原始表的聚合结果，返回每张表不一致的行数
+VERIFY_SQL = "SELECT " + ", ".join(_diff_sql(table) for table in ROLLUPS)
+
+
+def verify_rollups(cur) -> dict[str, int]:
+    cur.execute(VERIFY_SQL)
+    return {table: n for table, n in zip(ROLLUPS, cur.fetchone()) if n}
+
+
+def rebuild_rollups(cur) -> dict[str, int]:
+    # 直接由原始表重算（--stream 写入或早于汇总表的数据不会计入内存汇总）
+    counts = {}
+    for table, (key_cols, value_cols, source) in ROLLUPS.items():
+        cur.execute(f"DELETE FROM carco.{table}")
+        cur.execute(f"INSERT INTO carco.{table} ({', '.join((*key_cols, *value_cols))}) {source}")
+        counts[table] = cur.rowcount
+    return counts
+
+
+def check_rollups(conn):
+    with conn.cursor() as cur:
+        mismatches = verify_rollups(cur)
+    conn.rollback()
+    if mismatches:
+        detail = "，".join(f"{table} {n} 行" for table, n in mismatches.items())
+        raise SystemExit(
+            f"汇总表与原始表不一致：{detail}（--stream 写入及早于汇总表的数据不计入内存汇总，可用 --rebuild-rollups 由原始表重建）"
+        )
+    print(f"汇总表校验通过（{len(ROLLUPS)} 张）")
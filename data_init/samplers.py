@@ -0,0 +1,148 @@
+import hashlib
+import string
+from datetime import date
+
+import numpy as np
+
+VIN_ALPHABET = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+SERIAL_ALPHABET = string.ascii_uppercase + string.digits
+
+
+def block_generator(seed: int, stream: str, block: int) -> np.random.Generator:
+    # Philox 计数器型 RNG：key 由 (seed, 流) 派生，块号写入计数器高位，各块序列互不重叠
+    digest = hashlib.blake2b(f"{seed}:{stream}".encode(), digest_size=16).digest()
+    key = np.frombuffer(digest, dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=key, counter=np.array([0, 0, block, 0], dtype=np.uint64)))
+
+
+class AliasTable:
+    # Walker/Vose 别名表：构建一次，之后每次抽样 O(1)，替代逐行 random.choices 重建累积权重
+    def __init__(self, weights):
+        p = np.asarray(weights, dtype=np.float64)
+        n = len(p)
+        p = p * n / p.sum()
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+        small = [i for i in range(n) if p[i] < 1.0]
+        large = [i for i in range(n) if p[i] >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            self.prob[s] = p[s]
+            self.alias[s] = g
+            p[g] += p[s] - 1.0
+            (small if p[g] < 1.0 else large).append(g)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        idx = rng.integers(0, len(self.prob), size)
+        return np.where(rng.random(size) < self.prob[idx], idx, self.alias[idx])
+
+
+def skew_weights(weights, exponent: float) -> np.ndarray | None:
+    # 热点权重：自定义权重 × Zipf 项（第 k 个 1/k^exponent，按场景中的顺序）；全部相等时返回 None，调用方按均匀抽样
+    w = np.asarray(weights, dtype=np.float64)
+    if exponent:
+        w = w / np.arange(1, len(w) + 1) ** exponent
+    return None if np.all(w == w[0]) else w
+
+
+class ZipfKeys:
+    # 有界 Zipf 键（秩 k ∈ [1, n]，P(k) 近似 ∝ k^-s）：按连续幂律的逆 CDF 整列抽取，不建 n 大小的表，适合百万级客户；
+    # 秩再经乘法置换 k·a mod n 打散到键空间，热点键不集中在相邻主键（同一批数据页）上
+    def __init__(self, n: int, exponent: float):
+        self.n = n
+        self.s = exponent
+        a = max(1, int(n * 0.6180339887)) | 1
+        while np.gcd(a, n) != 1:
+            a += 2
+        self.a = a
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        # 返回 0 起的键偏移
+        u = rng.random(size)
+        if abs(self.s - 1.0) < 1e-9:
+            x = (self.n + 1.0) ** u
+        else:
+            x = (1.0 + u * ((self.n + 1.0) ** (1.0 - self.s) - 1.0)) ** (1.0 / (1.0 - self.s))
+        rank = np.minimum(x.astype(np.int64), self.n) - 1
+        return rank * self.a % self.n
+
+
+def random_codes(rng: np.random.Generator, alphabet: str, n: int, length: int) -> np.ndarray:
+    # 一次抽取 n×length 个字符下标，按行拼成定长字符串
+    chars = np.frombuffer(alphabet.encode("ascii"), dtype=np.uint8)
+    idx = rng.integers(0, len(chars), size=(n, length))
+    return chars[idx].view(f"S{length}").ravel().astype(f"U{length}")
+
+
+def random_days(rng: np.random.Generator, start: date, end: date, n: int) -> np.ndarray:
+    # [start, end] 内均匀抽取日期（datetime64[D]）
+    return np.datetime64(start, "D") + rng.integers(0, (end - start).days + 1, n)
+
+
+def biased_days(rng: np.random.Generator, biased: np.ndarray, share: float, window: tuple[date, date], spread: tuple[date, date]) -> np.ndarray:
+    # biased 行以 share 概率落在 window 内，其余行均匀分布在 spread 内
+    n = len(biased)
+    in_window = random_days(rng, window[0], window[1], n)
+    anywhere = random_days(rng, spread[0], spread[1], n)
+    return np.where(biased & (rng.random(n) < share), in_window, anywhere)
+
+
+def sale_prices(rng: np.random.Generator, base: np.ndarray, jitter: float, premium_share: float, premium: float) -> np.ndarray:
+    # 基准价 ±jitter 浮动，premium_share 的行再上浮 premium，取整到百元
+    n = len(base)
+    price = base * rng.uniform(1.0 - jitter, 1.0 + jitter, n)
+    price = np.where(rng.random(n) < premium_share, price * premium, price)
+    return np.round(price / 100.0) * 100
+
+
+class SaleDateSampler:
+    # 预计算每个 (候选起始月, 车型) 的候选月份累积权重，整列向量化抽取售出日期
+    def __init__(
+        self,
+        first_month: date,
+        last_month: date,
+        month_weights: dict[int, float],
+        boosts: dict[tuple[int, int, int], float],
+        n_models: int,
+        cap: date,
+        horizon: int = 6,
+        max_days: int = 150,
+    ):
+        self.first = np.datetime64(first_month, "M")
+        n_starts = int(np.datetime64(last_month, "M") - self.first) + 1
+        self.horizon = horizon
+        self.max_days = max_days
+        self.cap = np.datetime64(cap, "D")
+
+        months = self.first + np.arange(n_starts + horizon)
+        years = months.astype("datetime64[Y]").astype(int) + 1970
+        moys = months.astype(int) % 12 + 1
+        w = np.array([month_weights.get(int(m), 1.0) for m in moys])
+        weights = np.empty((n_starts, n_models, horizon))
+        for s in range(n_starts):
+            weights[s, :, :] = w[s:s + horizon]
+        for (y, m, model_idx), factor in boosts.items():
+            pos = int(np.datetime64(f"{y:04d}-{m:02d}", "M") - self.first)
+            for j in range(horizon):
+                if 0 <= pos - j < n_starts:
+                    weights[pos - j, model_idx, j] *= factor
+        self.cdf = np.cumsum(weights, axis=2)
+
+    def sample(self, rng: np.random.Generator, received_at: np.ndarray, model_idx: np.ndarray, speed: np.ndarray) -> np.ndarray:
+        n = len(received_at)
+        candidate_start = received_at + 1
+        candidate_end = np.minimum(received_at + self.max_days, self.cap)
+        # 速度因子影响平均交付周期（<1 更快，>1 更慢）
+        base_delay = np.clip((rng.triangular(5, 35, 120, n) * speed).astype(np.int64), 1, self.max_days)
+
+        start_month = candidate_start.astype("datetime64[M]")
+        cdf = self.cdf[(start_month - self.first).astype(np.int64), model_idx]
+        u = rng.random(n) * cdf[:, -1]
+        offset = np.minimum((cdf < u[:, None]).sum(axis=1), self.horizon - 1)
+        chosen = start_month + offset
+        month_days = ((chosen + 1).astype("datetime64[D]") - chosen.astype("datetime64[D]")).astype(np.int64)
+        sale = chosen.astype("datetime64[D]") + (rng.random(n) * month_days).astype(np.int64)
+
+        # 保障在收车之后、不超过上限
+        sale = np.where(sale <= candidate_start, candidate_start + base_delay, sale)
+        return np.minimum(sale, candidate_end)
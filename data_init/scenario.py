@@ -0,0 +1,117 @@
+import json
+import os
+from datetime import date
+
+# 场景文件：品牌/车型/规格/经销商/颜色/客户分布/日期区间等全部维度与分布参数（TOML 或同结构的 JSON）
+DEFAULT_SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "default.toml")
+
+# 热点分布的 Zipf 指数（0 为均匀）
+SKEW_KEYS = ("dealers", "models", "customers")
+
+REQUIRED_KEYS = ("part_category", "displacements", "colors", "scale", "dates", "customers", "sales", "recall", "units", "specs", "brands", "dealers")
+
+
+def _load_toml(path: str) -> dict:
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise SystemExit(f"读取 {path} 需要 Python 3.11+ 或 pip install tomli（也可改用 JSON 场景文件）")
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def _date(value) -> date:
+    # TOML 原生日期或 JSON 中的 YYYY-MM-DD 字符串
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def load_scenario(path: str | None) -> dict:
+    path = path or DEFAULT_SCENARIO
+    try:
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                scenario = json.load(f)
+        else:
+            scenario = _load_toml(path)
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"无法读取场景文件 {path}：{e}")
+
+    missing = [k for k in REQUIRED_KEYS if k not in scenario]
+    if missing:
+        raise SystemExit(f"场景文件 {path} 缺少：{', '.join(missing)}")
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    dates = scenario["dates"]
+    for key in ("start", "end", "sale_cap"):
+        dates[key] = _date(dates[key])
+    scenario["recall"]["window"] = [_date(d) for d in scenario["recall"]["window"]]
+
+    specs = {s["code"] for s in scenario["specs"]}
+    suppliers = {s["supplier"] for s in scenario["specs"]}
+    unknown = sorted({m["spec"] for b in scenario["brands"] for m in b["models"]} - specs)
+    if unknown:
+        raise SystemExit(f"场景文件 {path}：车型引用了未定义的规格 {', '.join(unknown)}")
+    if scenario["recall"]["supplier"] not in suppliers:
+        raise SystemExit(f"场景文件 {path}：召回供应商 {scenario['recall']['supplier']} 没有任何规格")
+    customers = scenario["customers"]
+    if len(customers["income_buckets"]) != len(customers["income_weights"]):
+        raise SystemExit(f"场景文件 {path}：income_buckets 与 income_weights 长度不一致")
+    if len(scenario["sales"]["month_weights"]) != 12:
+        raise SystemExit(f"场景文件 {path}：month_weights 需要 12 个月的权重")
+    if not (dates["start"] <= dates["end"] <= dates["sale_cap"]):
+        raise SystemExit(f"场景文件 {path}：需满足 dates.start <= dates.end <= dates.sale_cap")
+    # [skew] 可省略（均匀）；经销商与车型条目可带 weight 自定义权重
+    skew = scenario.setdefault("skew", {})
+    unknown = sorted(set(skew) - set(SKEW_KEYS))
+    if unknown:
+        raise SystemExit(f"场景文件 {path}：[skew] 只支持 {', '.join(SKEW_KEYS)}，不认识 {', '.join(unknown)}")
+    if any(skew[k] < 0 for k in skew):
+        raise SystemExit(f"场景文件 {path}：[skew] 的 Zipf 指数不能为负")
+    weights = [d.get("weight", 1.0) for d in scenario["dealers"]] + [m.get("weight", 1.0) for b in scenario["brands"] for m in b["models"]]
+    if any(w <= 0 for w in weights):
+        raise SystemExit(f"场景文件 {path}：经销商/车型的 weight 须为正数")
+    return scenario
+
+
+def _copies(sf: float, exponent: float) -> int:
+    return max(1, round(sf ** exponent))
+
+
+def _nth(name: str, k: int) -> str:
+    # 第 k 家同名分店：北京国贸店 → 北京国贸2店
+    return f"{name[:-1]}{k}店" if name.endswith("店") else f"{name}{k}"
+
+
+def scale_scenario(scenario: dict, sf: float) -> dict:
+    # TPC 式规模因子：车辆、客户线性增长；经销商与车型按 [scale] 的指数复制（分店沿用城市与速度，
+    # 后续车款沿用品牌、规格、价格与销售倾向）；日期区间按指数向过去延伸，截止日与召回区间不变
+    if sf <= 0:
+        raise SystemExit("--scale-factor must be positive")
+    scale = scenario["scale"]
+    scaled = dict(scenario)
+    scaled["counts"] = {k: max(1, round(scale[k] * sf)) for k in ("vehicles", "customers")}
+
+    n = _copies(sf, scale["dealers"])
+    scaled["dealers"] = [
+        dict(d, name=d["name"] if k == 1 else _nth(d["name"], k))
+        for k in range(1, n + 1) for d in scenario["dealers"]
+    ]
+    n = _copies(sf, scale["models"])
+    scaled["brands"] = [
+        dict(b, models=[
+            dict(m, name=m["name"] if k == 1 else f"{m['name']} 第{k}代")
+            for k in range(1, n + 1) for m in b["models"]
+        ])
+        for b in scenario["brands"]
+    ]
+
+    dates = scenario["dates"]
+    end_month = dates["end"].year * 12 + dates["end"].month - 1
+    base_months = end_month - (dates["start"].year * 12 + dates["start"].month - 1) + 1
+    months = max(1, round(base_months * sf ** scale["months"]))
+    if months != base_months:
+        first = end_month - months + 1
+        scaled["dates"] = dict(dates, start=date(first // 12, first % 12 + 1, 1))
+    return scaled
@@ -0,0 +1,274 @@
+import asyncio
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from psycopg_pool import AsyncConnectionPool
+
+from bulk import reserve_id_sql
+from generate import Catalog, CatalogTables, GenJob
+from identifiers import vins
+from samplers import ZipfKeys, block_generator, sale_prices
+
+# 每次从序列预留的主键数；事件内直接分配主键，VIN/序列号由主键置换得到，无需查重
+ID_BLOCK = 256
+# 预加载的未售库存与客户数量上限
+PRELOAD_LIMIT = 100_000
+# 落后计划超过该秒数时丢弃积压并重新对齐，不做突发补发
+MAX_LAG = 1.0
+
+UNSOLD_SQL = """
+SELECT i.vehicle_id, i.dealer_id, v.model_id
+FROM carco.inventory_assignment i
+JOIN carco.vehicle v ON v.vehicle_id = i.vehicle_id
+WHERE NOT EXISTS (SELECT 1 FROM carco.sale s WHERE s.vehicle_id = i.vehicle_id)
+LIMIT %s
+"""
+
+
+class _IdBlocks:
+    def __init__(self, pool: AsyncConnectionPool, table: str):
+        self.pool = pool
+        self.table = table
+        self.next = self.stop = 0
+        self.lock = asyncio.Lock()
+
+    async def take(self) -> int:
+        async with self.lock:
+            if self.next >= self.stop:
+                async with self.pool.connection() as conn:
+                    cur = await conn.execute(reserve_id_sql(self.table), (ID_BLOCK, ID_BLOCK))
+                    self.next = (await cur.fetchone())[0]
+                self.stop = self.next + ID_BLOCK
+            self.next += 1
+            return self.next - 1
+
+
+class _Latencies:
+    # 对数分桶直方图：长时间运行内存恒定，分位数相对误差约 2%
+    EDGES = np.geomspace(1e-5, 60.0, 800)
+
+    def __init__(self):
+        self.counts = np.zeros(len(self.EDGES) + 1, dtype=np.int64)
+
+    def add(self, values: list[float]):
+        self.counts += np.bincount(np.searchsorted(self.EDGES, values), minlength=len(self.counts))
+
+    def percentile(self, q: float) -> float:
+        total = self.counts.sum()
+        if not total:
+            return float("nan")
+        i = int(np.searchsorted(np.cumsum(self.counts), q / 100 * total))
+        return float(self.EDGES[min(i, len(self.EDGES) - 1)])
+
+
+class _Stats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events = {"receive": 0, "sale": 0}
+        self.errors = 0
+        self.dropped = 0
+        self.last_error: str | None = None
+        self.window: list[float] = []
+        self.total = _Latencies()
+
+    def record(self, kind: str, latency: float):
+        self.events[kind] += 1
+        self.window.append(latency)
+
+    def line(self, elapsed: float, window_rate: float, target: float, window: list[float]) -> str:
+        if window:
+            p50, p95, p99 = (np.percentile(window, [50, 95, 99]) * 1000).tolist()
+            latency = f"提交延迟 p50 {p50:.1f}ms p95 {p95:.1f}ms p99 {p99:.1f}ms"
+        else:
+            latency = "提交延迟 -"
+        return (
+            f"[{elapsed:7.1f}s] {window_rate:8.1f}/s（目标 {target:g}/s） "
+            f"入库 {self.events['receive']} 销售 {self.events['sale']} {latency} 错误 {self.errors} 丢弃 {self.dropped}"
+        )
+
+
+class _Simulator:
+    # 事件生成：车型/配置/颜色/经销商的抽样方式与批量生成一致；售出概率按车型，经销商越快被选中售出的权重越高
+    def __init__(self, pool: AsyncConnectionPool, job: GenJob, customers: np.ndarray, unsold: list[tuple]):
+        self.pool = pool
+        self.job = job
+        self.t = CatalogTables(job)
+        self.rng = block_generator(job.seed, "stream", 0)
+        self.customers = customers
+        self.ids = {table: _IdBlocks(pool, table) for table in ("transmission_unit", "vehicle", "sale")}
+
+        model_pos = {m: i for i, m in enumerate(self.t.model_ids.tolist())}
+        dealer_pos = {d: i for i, d in enumerate(self.t.dealer_ids.tolist())}
+        self.pending: list[list[tuple[int, int]]] = [[] for _ in dealer_pos]
+        for vehicle_id, dealer_id, model_id in unsold:
+            if dealer_id in dealer_pos and model_id in model_pos:
+                self.pending[dealer_pos[dealer_id]].append((vehicle_id, model_pos[model_id]))
+        self.dealer_weight = self.t.dealer_p / self.t.dealer_speed
+        # 热点客户：按 Zipf 在预加载的客户中抽取
+        skew = job.catalog.customer_skew
+        self.customer_keys = ZipfKeys(len(customers), skew) if skew else None
+        # 稳态下销售事件数 ≈ 入库事件数 × 平均售出概率
+        sold = float(self.t.sold_prob.mean())
+        self.sale_share = sold / (1.0 + sold)
+
+    async def event(self, stats: _Stats):
+        try:
+            sizes = np.array([len(p) for p in self.pending])
+            if sizes.any() and self.rng.random() < self.sale_share:
+                await self._sale(stats, sizes)
+            else:
+                await self._receive(stats)
+        except Exception as e:
+            stats.errors += 1
+            stats.last_error = f"{type(e).__name__}: {e}"
+
+    async def _receive(self, stats: _Stats):
+        t, rng = self.t, self.rng
+        model_idx = int(t.sample_models(rng, 1)[0])
+        cfg_pos = int(rng.random() * t.n_configs[model_idx])
+        spec_idx = np.array([t.config_spec_idx[model_idx, cfg_pos]])
+        dealer_idx = int(t.sample_dealers(rng, 1)[0])
+        unit_id = await self.ids["transmission_unit"].take()
+        vehicle_id = await self.ids["vehicle"].take()
+        today = date.today()
+        manufactured = today - timedelta(days=int(rng.integers(0, 31)))
+        produced = t.production_dates(rng, spec_idx).astype(object)[0]
+        vin = vins(rng, np.array([vehicle_id]), self.job.vin_check_digit)[0]
+        serial = t.serials(np.array([unit_id]), spec_idx)[0]
+        color_id = int(t.color_ids[rng.integers(0, len(t.color_ids))])
+        sold = rng.random() < t.sold_prob[model_idx]
+
+        async with self.pool.connection() as conn:
+            started = time.perf_counter()
+            async with conn.transaction():
+                await conn.execute(
+                    "INSERT INTO carco.transmission_unit(transmission_unit_id, part_spec_id, supplier_id, serial_number, production_date)"
+                    " VALUES (%s, %s, %s, %s, %s)",
+                    (unit_id, int(t.spec_ids[spec_idx[0]]), int(t.spec_supplier[spec_idx[0]]), serial, min(produced, manufactured)),
+                )
+                await conn.execute(
+                    "INSERT INTO carco.vehicle(vehicle_id, vin, model_id, config_id, color_id, transmission_unit_id, manufacture_date)"
+                    " VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    (vehicle_id, vin, int(t.model_ids[model_idx]), int(t.config_ids[model_idx, cfg_pos]), color_id, unit_id, manufactured),
+                )
+                await conn.execute(
+                    "INSERT INTO carco.inventory_assignment(vehicle_id, dealer_id, received_at) VALUES (%s, %s, %s)",
+                    (vehicle_id, int(t.dealer_ids[dealer_idx]), today),
+                )
+            stats.record("receive", time.perf_counter() - started)
+        if sold:
+            self.pending[dealer_idx].append((vehicle_id, model_idx))
+
+    async def _sale(self, stats: _Stats, sizes: np.ndarray):
+        t, rng = self.t, self.rng
+        weights = self.dealer_weight * (sizes > 0)
+        dealer_idx = int(rng.choice(len(weights), p=weights / weights.sum()))
+        stock = self.pending[dealer_idx]
+        pos = int(rng.integers(0, len(stock)))
+        stock[pos], stock[-1] = stock[-1], stock[pos]
+        vehicle_id, model_idx = stock.pop()
+        sale_id = await self.ids["sale"].take()
+        price = sale_prices(rng, t.price_base[[model_idx]], *t.sale_price)[0]
+        pick = self.customer_keys.sample(rng, 1)[0] if self.customer_keys is not None else rng.integers(0, len(self.customers))
+        customer_id = int(self.customers[pick])
+
+        async with self.pool.connection() as conn:
+            started = time.perf_counter()
+            async with conn.transaction():
+                await conn.execute(
+                    "INSERT INTO carco.sale(sale_id, vehicle_id, dealer_id, customer_id, sale_date, sale_price) VALUES (%s, %s, %s, %s, %s, %s)",
+                    (sale_id, vehicle_id, int(t.dealer_ids[dealer_idx]), customer_id, date.today(), round(float(price), 2)),
+                )
+            stats.record("sale", time.perf_counter() - started)
+
+
+async def _report(stats: _Stats, target: float, every: float):
+    last_t, last_n = stats.started, 0
+    while True:
+        await asyncio.sleep(every)
+        now = time.perf_counter()
+        window, stats.window = stats.window, []
+        stats.total.add(window)
+        done = sum(stats.events.values()) + stats.errors
+        print(stats.line(now - stats.started, (done - last_n) / (now - last_t), target, window), flush=True)
+        if stats.last_error:
+            print(f"  最近错误：{stats.last_error}", flush=True)
+            stats.last_error = None
+        last_t, last_n = now, done
+
+
+async def _drive(dsn: str, job: GenJob, rate: float, duration: float, pool_size: int, report_every: float):
+    async with AsyncConnectionPool(dsn, min_size=pool_size, max_size=pool_size, open=False) as pool:
+        async with pool.connection() as conn:
+            cur = await conn.execute("SELECT customer_id FROM carco.customer LIMIT %s", (PRELOAD_LIMIT,))
+            customers = np.array([r[0] for r in await cur.fetchall()], dtype=np.int64)
+            cur = await conn.execute(UNSOLD_SQL, (PRELOAD_LIMIT,))
+            unsold = await cur.fetchall()
+        if not len(customers):
+            raise SystemExit("--stream 需要已有客户数据，请先执行一次批量灌数")
+        sim = _Simulator(pool, job, customers, unsold)
+        print(f"流式写入：目标 {rate:g}/s，连接池 {pool_size}，预加载未售库存 {len(unsold)} 辆、客户 {len(customers)} 个")
+
+        stats = _Stats()
+        reporter = asyncio.create_task(_report(stats, rate, report_every))
+        # 在途事件数有上限：数据库变慢时降低实际速率，而不是无限排队拉高延迟
+        slots = asyncio.Semaphore(pool_size * 2)
+        tasks: set[asyncio.Task] = set()
+
+        def done(task: asyncio.Task):
+            tasks.discard(task)
+            slots.release()
+
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / rate
+        next_t = loop.time()
+        end = next_t + duration if duration > 0 else None
+        try:
+            while end is None or next_t < end:
+                await slots.acquire()
+                lag = loop.time() - next_t
+                if lag < 0:
+                    await asyncio.sleep(-lag)
+                elif lag > MAX_LAG:
+                    stats.dropped += int(lag * rate)
+                    next_t = loop.time()
+                task = asyncio.create_task(sim.event(stats))
+                tasks.add(task)
+                task.add_done_callback(done)
+                next_t += interval
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            reporter.cancel()
+            stats.total.add(stats.window)
+            elapsed = time.perf_counter() - stats.started
+            total = sum(stats.events.values())
+            p50, p95, p99 = (stats.total.percentile(q) * 1000 for q in (50, 95, 99))
+            print(
+                f"共 {total} 个事件（入库 {stats.events['receive']}，销售 {stats.events['sale']}），用时 {elapsed:.1f}s，"
+                f"平均 {total / elapsed:.1f}/s；提交延迟 p50 {p50:.1f}ms p95 {p95:.1f}ms p99 {p99:.1f}ms；错误 {stats.errors}，丢弃 {stats.dropped}"
+            )
+
+
+def run_stream(dsn: str, catalog: Catalog, seed: int, rate: float, duration: float, pool_size: int, report_every: float, vin_check_digit: bool):
+    # 日期以当天为准：生产/入库在最近半年内，售出即当天
+    today = date.today()
+    job = GenJob(
+        catalog=catalog,
+        seed=seed,
+        bases={},
+        customers=0,
+        vin_check_digit=vin_check_digit,
+        date_start=today - timedelta(days=180),
+        date_end=today,
+        sale_cap=today,
+    )
+    if sys.platform == "win32":
+        # psycopg 的异步连接不支持 Proactor 事件循环
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    try:
+        asyncio.run(_drive(dsn, job, rate, duration, pool_size, report_every))
+    except KeyboardInterrupt:
+        pass
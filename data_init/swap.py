@@ -0,0 +1,72 @@
+import re
+import time
+
+import psycopg
+
+from rollup import INIT_SQL
+
+# 零停机重灌（--swap）：在 carco_staging 中按 sql/init.sql 建好全部表、索引、触发器与视图并灌数，
+# 最后在一个短事务内与 carco 互换名称；原 carco 保留为 carco_old，--swap-rollback 可换回
+LIVE = "carco"
+STAGING = "carco_staging"
+OLD = "carco_old"
+# 互换时等待锁的上限：有长事务持有架构上的锁时放弃本次切换，而不是让后续查询排队
+LOCK_TIMEOUT = "5s"
+
+_SCHEMA_NAME = re.compile(r"\bcarco\b")
+_FUNCTION = re.compile(r"CREATE OR REPLACE FUNCTION .*?\$\$ LANGUAGE plpgsql;", re.S)
+
+
+def schema_sql(schema: str) -> str:
+    with open(INIT_SQL, encoding="utf-8") as f:
+        return _SCHEMA_NAME.sub(schema, f.read())
+
+
+def create_staging(dsn: str):
+    # init.sql 自带 DROP SCHEMA ... CASCADE，上一次未完成的 carco_staging 一并清除
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(schema_sql(STAGING))
+
+
+def _exists(cur, schema: str) -> bool:
+    cur.execute("SELECT 1 FROM pg_namespace WHERE nspname = %s", (schema,))
+    return cur.fetchone() is not None
+
+
+def _repoint_functions(cur, schema: str):
+    # 触发器函数体以文本引用架构名，改名后按新名称重建（触发器按 OID 引用函数，无需重建触发器）
+    for ddl in _FUNCTION.findall(schema_sql(schema)):
+        cur.execute(ddl)
+
+
+def _rename(dsn: str, renames: list[tuple[str, str]], repoint: tuple[str, ...]) -> float:
+    # 普通连接（不经 bulk.connect 的架构映射），改名与函数重建在同一事务内完成；返回该事务耗时
+    started = time.perf_counter()
+    with psycopg.connect(dsn) as conn:
+        conn.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        for old, new in renames:
+            conn.execute(f"ALTER SCHEMA {old} RENAME TO {new}")
+        with conn.cursor() as cur:
+            for schema in repoint:
+                _repoint_functions(cur, schema)
+    return time.perf_counter() - started
+
+
+def swap_in(dsn: str) -> float:
+    # 旧的 carco_old 先单独删除（可能较慢），互换本身只有改名与函数重建
+    with psycopg.connect(dsn, autocommit=True) as conn, conn.cursor() as cur:
+        if not _exists(cur, STAGING):
+            raise SystemExit(f"{STAGING} 不存在，无法切换")
+        cur.execute(f"DROP SCHEMA IF EXISTS {OLD} CASCADE")
+        live = _exists(cur, LIVE)
+    if live:
+        return _rename(dsn, [(LIVE, OLD), (STAGING, LIVE)], (LIVE, OLD))
+    return _rename(dsn, [(STAGING, LIVE)], (LIVE,))
+
+
+def swap_back(dsn: str) -> float:
+    with psycopg.connect(dsn, autocommit=True) as conn, conn.cursor() as cur:
+        if not _exists(cur, OLD):
+            raise SystemExit(f"{OLD} 不存在，没有可回滚的旧数据")
+    tmp = f"{LIVE}_swap_tmp"
+    return _rename(dsn, [(LIVE, tmp), (OLD, LIVE), (tmp, OLD)], (LIVE, OLD))
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# data_init 的模块以同级导入方式互相引用（与直接运行 python main.py 一致）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,74 @@
+import os
+import time
+from dataclasses import replace
+
+import pytest
+
+import cache
+from cache import CachedShard, DatasetCache
+from generate import GenJob
+
+ROWS = {"customer": [(1, "张伟", "M", 120000.0, "北京"), (2, "李娜", "F", None, "上海")]}
+
+
+@pytest.fixture
+def job():
+    return GenJob(catalog=None, seed=42, bases={"customer": 1}, customers=2)
+
+
+def _shard_bytes(store: DatasetCache, job, start: int) -> int:
+    path = store._path(job, "customer", start, start + 2)
+    return sum(f.stat().st_size for f in os.scandir(path))
+
+
+def test_put_then_get_round_trip(tmp_path, job):
+    store = DatasetCache(str(tmp_path), 1 << 30)
+    assert store.get(job, "customer", 0, 2) is None
+    store.put(job, "customer", 0, 2, ROWS, {3: 2}, {"rollup_sales_monthly": [[1, 2, 3, 4, 5]]})
+    shard, demand, rollup = store.get(job, "customer", 0, 2)
+    assert isinstance(shard, CachedShard)
+    assert shard.counts == {"customer": 2}
+    assert demand == {3: 2}
+    assert rollup == {"rollup_sales_monthly": [[1, 2, 3, 4, 5]]}
+    assert sorted(os.listdir(shard.path)) == ["customer.bin", "meta.json"]
+
+
+def test_key_changes_with_seed_job_range_and_code_version(tmp_path, job, monkeypatch):
+    store = DatasetCache(str(tmp_path), 1 << 30)
+    key = store._path(job, "customer", 0, 2)
+    assert store._path(job, "customer", 0, 2) == key
+    assert store._path(replace(job, seed=43), "customer", 0, 2) != key
+    assert store._path(replace(job, customers=3), "customer", 0, 2) != key
+    assert store._path(replace(job, bases={"customer": 101}), "customer", 0, 2) != key
+    assert store._path(job, "customer", 2, 4) != key
+    assert store._path(job, "vehicle", 0, 2) != key
+    monkeypatch.setattr(cache, "code_version", lambda name_source: "edited")
+    assert store._path(job, "customer", 0, 2) != key
+
+
+def test_evict_oldest_until_under_limit(tmp_path, job):
+    store = DatasetCache(str(tmp_path), 1 << 30)
+    now = time.time()
+    for i in range(4):
+        store.put(job, "customer", 2 * i, 2 * i + 2, ROWS, {}, None)
+        # 第 i 个分片最近一次使用在 (4 - i) 小时前
+        os.utime(store._path(job, "customer", 2 * i, 2 * i + 2), (now - (4 - i) * 3600,) * 2)
+    size = _shard_bytes(store, job, 0)
+    store.max_bytes = 2 * size
+
+    removed, remaining = store.evict(now)
+    assert (removed, remaining) == (2, 2 * size)
+    assert [store.get(job, "customer", 2 * i, 2 * i + 2) is not None for i in range(4)] == [False, False, True, True]
+
+
+def test_evict_keeps_shards_used_by_this_run(tmp_path, job):
+    store = DatasetCache(str(tmp_path), 0)
+    started = time.time() - 60
+    store.put(job, "customer", 0, 2, ROWS, {}, None)
+    store.put(job, "customer", 2, 4, ROWS, {}, None)
+    os.utime(store._path(job, "customer", 0, 2), (started - 3600,) * 2)
+
+    removed, remaining = store.evict(started)
+    assert removed == 1
+    assert remaining == _shard_bytes(store, job, 2) > store.max_bytes
+    assert store.get(job, "customer", 2, 4) is not None
@@ -0,0 +1,33 @@
+import json
+from datetime import date
+
+from checkpoint import Checkpoint, _job_state
+from generate import GenJob
+
+
+def _resumed(job) -> GenJob:
+    # 与登记、续跑相同：作业状态经 JSON 存入 data_init_run.job，再按原参数重建 GenJob
+    state = json.loads(json.dumps(_job_state(job)))
+    ckpt = Checkpoint(None, 1, "append", job.seed, {}, state)
+    return GenJob(catalog=job.catalog, **ckpt.job_kwargs())
+
+
+def test_job_round_trips_through_run_record():
+    job = GenJob(
+        catalog=None,
+        seed=2**63 - 1,
+        bases={"customer": 11, "transmission_unit": 21, "vehicle": 31, "sale": 41, "spare_unit": 51},
+        customers=500,
+        spare_counts={3: 120, 4: 80},
+        vin_check_digit=True,
+        name_source="faker",
+        date_start=date(2025, 11, 1),
+        date_end=date(2026, 6, 30),
+        sale_cap=date(2026, 6, 30),
+    )
+    assert _resumed(job) == job
+
+
+def test_default_window_round_trips():
+    job = GenJob(catalog=None, seed=7, bases={"customer": 1, "vehicle": 1}, customers=10)
+    assert _resumed(job) == job
@@ -0,0 +1,84 @@
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import pytest
+
+from export import OfflineDimensions
+from generate import GenJob, chunk_ranges, generate_shard, unit_pool_sizes
+from main import build_catalog
+from scenario import load_scenario
+
+VEHICLES = 10_000
+CUSTOMERS = 3_000
+
+
+def _job(scenario) -> GenJob:
+    # 维度按离线模式在进程内分配主键，不访问数据库
+    dims = OfflineDimensions()
+    catalog = build_catalog(dims, scenario)
+    spare_counts = unit_pool_sizes(catalog, VEHICLES)
+    return GenJob(
+        catalog=catalog,
+        seed=42,
+        bases={
+            "customer": dims.reserve("customer", CUSTOMERS),
+            "transmission_unit": dims.reserve("transmission_unit", VEHICLES),
+            "vehicle": dims.reserve("vehicle", VEHICLES),
+            "sale": dims.reserve("sale", VEHICLES),
+            "spare_unit": dims.reserve("transmission_unit", sum(spare_counts.values())),
+        },
+        customers=CUSTOMERS,
+        spare_counts=spare_counts,
+    )
+
+
+@pytest.fixture(scope="module")
+def job():
+    return _job(load_scenario(None))
+
+
+@pytest.fixture(scope="module")
+def skewed_job():
+    scenario = load_scenario(None)
+    scenario["skew"] = {"dealers": 1.0, "models": 0.8, "customers": 1.1}
+    return _job(scenario)
+
+
+def _phases(job):
+    return [("customer", CUSTOMERS), ("vehicle", VEHICLES), ("spare_unit", sum(job.spare_counts.values()))]
+
+
+def _digests(results) -> dict[str, str]:
+    # 按分片顺序拼接各表行后取摘要
+    hashes = {}
+    for rows, *_ in results:
+        for table, table_rows in rows.items():
+            h = hashes.setdefault(table, hashlib.md5())
+            for row in table_rows:
+                h.update(repr(row).encode())
+    return {table: h.hexdigest() for table, h in hashes.items()}
+
+
+def _serial(job, chunk_size: int) -> dict[str, str]:
+    return _digests(generate_shard(job, kind, *r) for kind, n in _phases(job) for r in chunk_ranges(n, chunk_size))
+
+
+def test_digests_independent_of_chunk_size(job):
+    assert _serial(job, 4096) == _serial(job, 3 * 4096) == _serial(job, 1 << 20)
+
+
+def test_digests_independent_of_workers(job):
+    tasks = [(kind, *r) for kind, n in _phases(job) for r in chunk_ranges(n, 4096)]
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(generate_shard, *zip(*[(job, *t) for t in tasks])))
+    assert _digests(results) == _serial(job, 4096)
+
+
+def test_skewed_digests_independent_of_chunk_size(skewed_job, job):
+    assert _serial(skewed_job, 4096) == _serial(skewed_job, 3 * 4096)
+    assert _serial(skewed_job, 4096) != _serial(job, 4096)
+
+
+def test_seed_changes_data(job):
+    assert _serial(job, 4096) != _serial(replace(job, seed=43), 4096)
@@ -0,0 +1,65 @@
+import json
+import os
+import struct
+
+from export import PGCOPY_HEADER, export_rows, write_manifest
+
+ROWS = {
+    "brand": [(1, "哈弗"), (2, "传祺")],
+    "customer": [(1, "张伟", "M", 120000.0, "北京"), (2, "李娜", "F", None, "上海"), (3, "王芳", "F", 80000.0, "广州")],
+}
+
+
+def _read_pgcopy(path: str) -> list[list[bytes | None]]:
+    # 按 PostgreSQL 二进制 COPY 格式解析：文件头、逐行 (字段数, [长度, 数据]...)、结束标记 -1
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data.startswith(PGCOPY_HEADER)
+    pos, rows = len(PGCOPY_HEADER), []
+    while True:
+        (fields,) = struct.unpack_from("!h", data, pos)
+        pos += 2
+        if fields == -1:
+            break
+        row = []
+        for _ in range(fields):
+            (size,) = struct.unpack_from("!i", data, pos)
+            pos += 4
+            row.append(None if size == -1 else data[pos:pos + size])
+            pos += max(size, 0)
+        rows.append(row)
+    assert pos == len(data)
+    return rows
+
+
+def test_binary_export_round_trip(tmp_path):
+    out = str(tmp_path)
+    counts = export_rows(out, "binary", ROWS, "dim")
+    write_manifest(out, "binary", counts, {"brand": 2, "customer": 3}, {"seed": 1})
+
+    with open(os.path.join(out, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    for table, rows in ROWS.items():
+        entry = manifest["tables"][table]
+        assert entry["rows"] == len(rows)
+        decoded = [r for name in entry["files"] for r in _read_pgcopy(os.path.join(out, name))]
+        assert len(decoded) == len(rows)
+        assert all(len(r) == len(rows[0]) for r in decoded)
+
+    brands = _read_pgcopy(os.path.join(out, "brand", "part-dim.bin"))
+    assert [(struct.unpack("!q", i)[0], name.decode()) for i, name in brands] == ROWS["brand"]
+    assert _read_pgcopy(os.path.join(out, "customer", "part-dim.bin"))[1][3] is None
+    assert manifest["sequences"] == {"brand": 2, "customer": 3}
+    assert manifest["tables"]["vehicle"] == {"rows": 0, "files": []}
+
+
+def test_load_script_copies_every_file(tmp_path):
+    out = str(tmp_path)
+    counts = export_rows(out, "csv", ROWS, "dim")
+    write_manifest(out, "csv", counts, {"brand": 2}, {})
+    with open(os.path.join(out, "load.sql"), encoding="utf-8") as f:
+        script = f.read()
+    assert "\\copy carco.brand (brand_id, name) FROM 'brand/part-dim.csv' WITH (FORMAT csv, HEADER true)" in script
+    assert "\\copy carco.customer (" in script
+    assert "SELECT setval(pg_get_serial_sequence('carco.brand', 'brand_id'), 2);" in script
+    assert script.index("BEGIN;") < script.index("\\copy") < script.index("COMMIT;")
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+import fanout
+from fanout import FanOut
+
+ROWS = {"brand": [(1, "哈弗"), (2, "传祺")]}
+
+
+@pytest.fixture
+def fan(monkeypatch):
+    # 目标线程不连接数据库、立即退出：分片留在队列里，由测试调用 drain 模拟目标写完
+    monkeypatch.setattr(fanout.Target, "_run", lambda self: None)
+    fans = []
+
+    def make(spool_shards: int) -> FanOut:
+        f = FanOut(["dbname=fast", "dbname=slow"])
+        f.put(ROWS, "probe")
+        size = f.targets[0].lag_bytes
+        for t in f.targets:
+            drain(t)
+        f.spool_limit = spool_shards * size
+        fans.append(f)
+        return f
+
+    yield make
+    for f in fans:
+        for t in f.targets:
+            drain(t)
+        f.close()
+
+
+def drain(target):
+    while not target.queue.empty():
+        target._done(target.queue.get())
+
+
+def test_slow_target_within_cap_does_not_block(fan):
+    f = fan(4)
+    fast, slow = f.targets
+    started = time.perf_counter()
+    for i in range(4):
+        f.put(ROWS, f"s{i}")
+        drain(fast)
+    assert time.perf_counter() - started < 0.2
+    assert (fast.error, slow.error) == (None, None)
+    assert slow.queue.qsize() == slow.max_backlog == 4
+    assert fast.lag_bytes == 0
+
+
+def test_detach_only_when_over_cap_and_behind(fan):
+    f = fan(4)
+    fast, slow = f.targets
+    for i in range(5):
+        f.put(ROWS, f"s{i}")
+        drain(fast)
+    assert slow.status == "detached"
+    assert "--fanout-spool-size" in slow.error
+    assert fast.error is None
+    # 被摘除的目标不再接收分片
+    f.put(ROWS, "s5")
+    assert slow.queue.qsize() == 4 and fast.queue.qsize() == 1
+
+
+def test_generation_waits_when_all_targets_over_cap(fan):
+    f = fan(2)
+    for i in range(2):
+        f.put(ROWS, f"s{i}")
+
+    def release():
+        time.sleep(0.3)
+        # 两个目标同时写完：先写完的一个不会让另一个显得落后
+        with f.progress:
+            for t in f.targets:
+                drain(t)
+
+    drainer = threading.Thread(target=release)
+    drainer.start()
+    started = time.perf_counter()
+    f.put(ROWS, "s2")
+    drainer.join()
+    assert time.perf_counter() - started >= 0.25
+    assert all(t.error is None and t.queue.qsize() == 1 for t in f.targets)
+
+
+def test_shard_larger_than_cap_is_accepted_without_backlog(fan):
+    f = fan(0)
+    f.put(ROWS, "big")
+    assert all(t.error is None and t.queue.qsize() == 1 for t in f.targets)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from identifiers import SERIAL_ID_BITS, VIN_ID_BITS, feistel, serials, vin_check_digits, vins
+from samplers import block_generator
+
+
+def test_feistel_is_a_permutation():
+    x = np.arange(1 << 12)
+    assert np.array_equal(np.sort(feistel(x, 12)), x.astype(np.uint64))
+
+
+def test_feistel_rejects_keys_outside_the_space():
+    with pytest.raises(ValueError):
+        feistel(np.array([1 << 12]), 12)
+
+
+def test_vins_and_serials_are_unique():
+    ids = np.arange(1, 200_001)
+    rng = block_generator(42, "vin", 0)
+    assert len(set(vins(rng, ids).tolist())) == len(ids)
+    # 后缀只由主键决定：去掉规格前缀后仍唯一
+    suffixes = [s.split("-", 1)[1] for s in serials(ids, ["A"] * len(ids))]
+    assert len(set(suffixes)) == len(ids)
+    assert feistel(ids, VIN_ID_BITS).max() < 1 << VIN_ID_BITS
+    assert feistel(ids, SERIAL_ID_BITS).max() < 1 << SERIAL_ID_BITS
+
+
+def test_known_vin_check_digits():
+    # ISO 3779 / 49 CFR 565 的示例 VIN
+    known = np.array(["1M8GDM9AXKP042788", "11111111111111111", "1HGCM82633A004352"])
+    assert vin_check_digits(known).tolist() == ["X", "1", "3"]
+
+
+def test_generated_vins_carry_valid_check_digits():
+    out = vins(block_generator(7, "vin", 3), np.arange(1, 10_001), check_digit=True)
+    assert np.array_equal(np.array([v[8] for v in out.tolist()]), vin_check_digits(out))
@@ -0,0 +1,52 @@
+from argparse import Namespace
+from datetime import date
+
+import pytest
+
+from main import CONFLICTS, check_conflicts
+
+# 各选项的默认值（与 main() 的解析器一致）
+DEFAULTS = dict(
+    dsn=None, reset=False, workers=1, writers=1, copy_format="binary", output_dir=None, resume=False, append_until=None,
+    stream=False, rebuild_rollups=False, swap=False, swap_rollback=False, partition_by_month=False, fast_load=False, cache_dir=None,
+)
+
+# 把表中的选项名设为“已启用”的取值
+ENABLE = {
+    "multiple --dsn": {"dsn": ["dbname=a", "dbname=b"]},
+    "--workers": {"workers": 4},
+    "--writers": {"writers": 2},
+    "--copy-format text": {"copy_format": "text"},
+    "--output-dir": {"output_dir": "out"},
+    "--append-until": {"append_until": date(2025, 1, 1)},
+    "--cache-dir": {"cache_dir": "cache"},
+}
+
+
+def _args(*options) -> Namespace:
+    values = dict(DEFAULTS)
+    for option in options:
+        values.update(ENABLE.get(option, {option.removeprefix("--").replace("-", "_"): True}))
+    return Namespace(**values)
+
+
+@pytest.mark.parametrize("option, other", [(option, other) for option, others, _ in CONFLICTS for other in others])
+def test_each_conflict_is_rejected(option, other):
+    with pytest.raises(SystemExit) as e:
+        check_conflicts(_args(option, other))
+    assert option in str(e.value) and other in str(e.value)
+
+
+@pytest.mark.parametrize("option", sorted({option for option, _, _ in CONFLICTS}))
+def test_option_alone_is_accepted(option):
+    check_conflicts(_args(option))
+
+
+@pytest.mark.parametrize("options", [
+    ("multiple --dsn", "--writers", "--reset"),
+    ("--output-dir", "--workers", "--copy-format text"),
+    ("--swap", "--partition-by-month", "--fast-load", "--workers"),
+    ("--resume", "--fast-load", "--cache-dir"),
+])
+def test_supported_combinations(options):
+    check_conflicts(_args(*options))
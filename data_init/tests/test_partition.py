@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from psycopg import errors
+
+from partition import ensure_partitions, route
+
+
+class FakeCursor:
+    # 记录建分区语句；failures 为 叶子分区名 -> 建表时抛出的异常
+    def __init__(self, failures):
+        self.failures = failures
+        self.created = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if sql.startswith("CREATE TABLE"):
+            name = sql.split()[2].removeprefix("carco.")
+            if name in self.failures:
+                raise self.failures[name]
+            self.created.append(name)
+
+    def fetchall(self):
+        return [("sale_default",), ("inventory_assignment_default",), ("sale_p202401",), ("inventory_assignment_p202401",)]
+
+
+class FakeConn:
+    def __init__(self, failures=None):
+        self.cur = FakeCursor(failures or {})
+        self.rolled_back = 0
+        self.committed = 0
+
+    def cursor(self):
+        return self.cur
+
+    @contextmanager
+    def transaction(self):
+        try:
+            yield
+        except Exception:
+            self.rolled_back += 1
+            raise
+
+    def commit(self):
+        self.committed += 1
+
+
+def test_route_to_leaves_or_default():
+    rows = {
+        "sale": [(1, 10, 3, 7, date(2024, 1, 31), 99.0), (2, 11, 3, 7, date(2024, 2, 1), 99.0)],
+        "inventory_assignment": [(10, 3, date(2024, 1, 5))],
+        "vehicle": [(10,)],
+    }
+    groups = route({"sale_p202401", "inventory_assignment_p202401"}, rows)
+    assert groups == {
+        "sale_p202401": ("sale", [rows["sale"][0]]),
+        "sale": ("sale", [rows["sale"][1]]),
+        "inventory_assignment_p202401": ("inventory_assignment", rows["inventory_assignment"]),
+    }
+
+
+def test_ensure_partitions_creates_missing_months():
+    conn = FakeConn()
+    assert ensure_partitions(conn, date(2024, 1, 15), date(2024, 3, 1)) == 4
+    assert conn.cur.created == ["sale_p202402", "inventory_assignment_p202402", "sale_p202403", "inventory_assignment_p202403"]
+    assert conn.committed == 1
+
+
+@pytest.mark.parametrize("error", [errors.CheckViolation, errors.InvalidObjectDefinition, errors.DuplicateTable])
+def test_expected_partition_failures_are_skipped(error):
+    conn = FakeConn({"sale_p202402": error("default partition holds rows")})
+    assert ensure_partitions(conn, date(2024, 2, 1), date(2024, 2, 29)) == 1
+    assert conn.cur.created == ["inventory_assignment_p202402"]
+    assert conn.rolled_back == 1
+
+
+@pytest.mark.parametrize("error", [errors.InsufficientPrivilege, errors.LockNotAvailable])
+def test_other_partition_failures_propagate(error):
+    conn = FakeConn({"sale_p202402": error("nope")})
+    with pytest.raises(error):
+        ensure_partitions(conn, date(2024, 2, 1), date(2024, 2, 29))
+    assert conn.committed == 0
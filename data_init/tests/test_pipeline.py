@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from pipeline import run_pipeline
+
+ITEMS = list(range(40))
+
+
+def _run(items, produce, consume, writers, **kwargs):
+    # 在单独线程中消费流水线，超时即视为死锁
+    out, errors = [], []
+
+    def drain():
+        try:
+            out.extend(run_pipeline(items, produce, consume, 2, writers, **kwargs))
+        except Exception as e:
+            errors.append(e)
+
+    t = threading.Thread(target=drain, daemon=True)
+    t.start()
+    t.join(timeout=10)
+    assert not t.is_alive(), "pipeline deadlocked"
+    assert not [t for t in threading.enumerate() if t.name.startswith("data-init-")]
+    return out, errors
+
+
+@pytest.mark.parametrize("writers", [1, 3])
+def test_every_item_consumed_once(writers):
+    opened, closed = [], []
+
+    def open_writer():
+        opened.append(object())
+        return opened[-1]
+
+    def consume(state, item, payload):
+        assert (state is None) == (writers == 1)
+        time.sleep(0.001)
+        return payload + 1
+
+    out, errors = _run(ITEMS, lambda i: i * 10, consume, writers, open_writer=open_writer, close_writer=closed.append)
+    assert not errors
+    assert sorted(out) == [(i, i * 10 + 1) for i in ITEMS]
+    if writers == 1:
+        assert out == sorted(out)
+    assert len(opened) == (writers if writers > 1 else 0)
+    assert sorted(map(id, closed)) == sorted(map(id, opened))
+
+
+@pytest.mark.parametrize("writers", [1, 3])
+def test_producer_error_propagates(writers):
+    def produce(item):
+        if item == 7:
+            raise ValueError("generate failed")
+        return item
+
+    out, errors = _run(ITEMS, produce, lambda state, item, payload: payload, writers)
+    assert [str(e) for e in errors] == ["generate failed"]
+    assert all(item < 7 for item, _ in out)
+
+
+@pytest.mark.parametrize("writers", [1, 3])
+def test_consumer_error_propagates(writers):
+    consumed = []
+
+    def consume(state, item, payload):
+        if item == 5:
+            raise RuntimeError("copy failed")
+        consumed.append(item)
+        return payload
+
+    out, errors = _run(ITEMS, lambda i: i, consume, writers, open_writer=object, close_writer=lambda state: None)
+    assert [str(e) for e in errors] == ["copy failed"]
+    # 失败后生产者与其余写入端停止，至多写完各自手上和队列中的少量分片
+    assert len(consumed) < len(ITEMS) - 1
+
+
+def test_slow_writers_keep_queue_bounded():
+    # 在途分片（已生成、未写完）至多：队列深度 2 + 每个写入端手上 1 个 + 生产者刚生成待放入的 1 个
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def produce(item):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        return item
+
+    def consume(writer, item, payload):
+        time.sleep(0.005)
+        with lock:
+            state["in_flight"] -= 1
+        return payload
+
+    out, errors = _run(ITEMS, produce, consume, 3, open_writer=object, close_writer=lambda writer: None)
+    assert not errors and len(out) == len(ITEMS)
+    assert state["peak"] <= 2 + 3 + 1
@@ -0,0 +1,85 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from samplers import AliasTable, SaleDateSampler, ZipfKeys, block_generator, skew_weights
+
+N = 200_000
+
+
+def test_alias_table_matches_weights():
+    weights = np.array([5.0, 1.0, 0.0, 3.0, 0.5, 10.0])
+    counts = np.bincount(AliasTable(weights).sample(block_generator(1, "alias", 0), N), minlength=len(weights))
+    assert counts[2] == 0
+    assert np.allclose(counts / N, weights / weights.sum(), atol=0.005)
+
+
+def test_skew_weights_combine_custom_weight_and_zipf():
+    assert skew_weights([1.0, 1.0, 1.0], 0) is None
+    assert np.allclose(skew_weights([1.0, 1.0, 1.0, 1.0], 1.0), [1, 1 / 2, 1 / 3, 1 / 4])
+    # 自定义权重与 Zipf 项相乘：第 k 个条目权重 ×k 时抵消为均匀
+    assert skew_weights([1.0, 2.0, 3.0], 1.0) is None
+    assert np.allclose(skew_weights([3.0, 1.0, 2.0], 1.0), [3.0, 1 / 2, 2 / 3])
+    assert np.allclose(skew_weights([3.0, 1.0], 0), [3.0, 1.0])
+
+
+def test_zipf_keys_follow_power_law():
+    n, s = 1000, 1.2
+    keys = ZipfKeys(n, s)
+    sample = keys.sample(block_generator(2, "zipf", 0), N)
+    assert sample.min() >= 0 and sample.max() < n
+    # 键 = (秩-1)·a mod n，逆置换还原秩，与连续幂律按整数区间积分的概率比较
+    ranks = sample * pow(keys.a, -1, n) % n + 1
+    edges = np.arange(1, n + 2, dtype=np.float64) ** (1.0 - s)
+    expected = np.diff(edges) / (edges[-1] - edges[0])
+    observed = np.bincount(ranks, minlength=n + 1)[1:] / N
+    assert np.allclose(observed[:20], expected[:20], atol=0.005)
+    assert observed[0] > observed[1] > observed[9]
+
+
+def test_zipf_keys_harmonic_exponent():
+    keys = ZipfKeys(500, 1.0)
+    ranks = keys.sample(block_generator(3, "zipf", 0), N) * pow(keys.a, -1, 500) % 500 + 1
+    expected = np.log(np.arange(2, 502) / np.arange(1, 501)) / np.log(501)
+    assert np.allclose(np.bincount(ranks, minlength=501)[1:] / N, expected, atol=0.005)
+
+
+@pytest.mark.parametrize("n", [1, 2, 10, 1024, 5_000])
+def test_zipf_keys_permutation_is_bijective(n):
+    keys = ZipfKeys(n, 1.1)
+    assert np.array_equal(np.sort(np.arange(n) * keys.a % n), np.arange(n))
+
+
+def _sale_sampler(boosts=None):
+    # 与 generate.py 相同：候选起始月覆盖到售出日期上限
+    return SaleDateSampler(date(2023, 1, 1), date(2024, 3, 31), {}, boosts or {}, n_models=2, cap=date(2024, 3, 31))
+
+
+def test_sale_dates_stay_within_bounds():
+    rng = block_generator(4, "sale", 0)
+    received = np.datetime64("2023-01-01") + rng.integers(0, 365, N)
+    model_idx = rng.integers(0, 2, N)
+    sale = _sale_sampler().sample(rng, received, model_idx, rng.uniform(0.5, 1.5, N))
+    assert (sale > received).all()
+    assert (sale <= received + 150).all()
+    assert (sale <= np.datetime64("2024-03-31")).all()
+
+
+def test_sale_date_boost_shifts_sales_into_month():
+    received = np.full(N, np.datetime64("2023-03-15"))
+    model_idx = np.repeat([0, 1], N // 2)
+    speed = np.ones(N)
+    sale = _sale_sampler({(2023, 5, 0): 4.0}).sample(block_generator(5, "sale", 0), received, model_idx, speed)
+    in_may = sale.astype("datetime64[M]") == np.datetime64("2023-05")
+    # 只有车型 0 在 5 月加权
+    assert in_may[: N // 2].mean() > 2 * in_may[N // 2:].mean()
+
+
+def test_sale_dates_are_reproducible():
+    received = np.datetime64("2023-06-01") + np.arange(1000) % 90
+    model_idx = np.arange(1000) % 2
+    sampler = _sale_sampler()
+    a = sampler.sample(block_generator(6, "sale", 9), received, model_idx, np.ones(1000))
+    b = sampler.sample(block_generator(6, "sale", 9), received, model_idx, np.ones(1000))
+    assert np.array_equal(a, b)
@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+
+from scenario import load_scenario, scale_scenario
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    return load_scenario(None)
+
+
+def _models(scenario) -> list[str]:
+    return [m["name"] for b in scenario["brands"] for m in b["models"]]
+
+
+def _months(dates) -> int:
+    return (dates["end"].year - dates["start"].year) * 12 + dates["end"].month - dates["start"].month + 1
+
+
+def test_scale_factor_one_keeps_dimensions(scenario):
+    scaled = scale_scenario(scenario, 1)
+    assert scaled["counts"] == {"vehicles": scenario["scale"]["vehicles"], "customers": scenario["scale"]["customers"]}
+    assert scaled["dealers"] == scenario["dealers"]
+    assert scaled["brands"] == scenario["brands"]
+    assert scaled["dates"] == scenario["dates"]
+
+
+def test_dimensions_follow_scale_exponents(scenario):
+    # 默认场景：经销商 ∝ SF，车型 ∝ √SF，月数 ∝ SF^0.25；SF=16 时分别 ×16、×4、×2
+    assert (scenario["scale"]["dealers"], scenario["scale"]["models"], scenario["scale"]["months"]) == (1.0, 0.5, 0.25)
+    scaled = scale_scenario(scenario, 16)
+    assert scaled["counts"] == {"vehicles": 16 * scenario["scale"]["vehicles"], "customers": 16 * scenario["scale"]["customers"]}
+    assert len(scaled["dealers"]) == 16 * len(scenario["dealers"])
+    assert len(_models(scaled)) == 4 * len(_models(scenario))
+    assert len(set(_models(scaled))) == len(_models(scaled))
+    assert len({d["name"] for d in scaled["dealers"]}) == len(scaled["dealers"])
+
+    dates = scenario["dates"]
+    assert _months(scaled["dates"]) == 2 * _months(dates)
+    assert scaled["dates"]["start"].day == 1
+    assert (scaled["dates"]["end"], scaled["dates"]["sale_cap"]) == (dates["end"], dates["sale_cap"])
+    assert scaled["recall"] == scenario["recall"]
+
+
+def test_branch_and_model_names(scenario):
+    # 分店沿用原店的城市与速度，后续车款按代数命名
+    scaled = scale_scenario(scenario, 4)
+    branches = {d["name"]: d for d in scaled["dealers"]}
+    assert branches["北京国贸4店"] == dict(branches["北京国贸店"], name="北京国贸4店")
+    model = scenario["brands"][0]["models"][0]
+    assert dict(model, name=f"{model['name']} 第2代") in scaled["brands"][0]["models"]
+
+
+def test_small_scale_shortens_window(scenario):
+    scaled = scale_scenario(scenario, 1 / 16)
+    assert len(scaled["dealers"]) == len(scenario["dealers"])
+    assert scaled["dates"]["start"] > scenario["dates"]["start"]
+    assert scaled["dates"]["start"] == date(scaled["dates"]["start"].year, scaled["dates"]["start"].month, 1)
+
+
+def test_non_positive_scale_factor_rejected(scenario):
+    with pytest.raises(SystemExit):
+        scale_scenario(scenario, 0)
@@ -0,0 +1,362 @@
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import psycopg
+
+# 查询负载：按后端 AnalyticsService / InventoryService / RecallService 发出的 SQL 形状，对已灌数的 carco 架构并发执行，
+# 统计各查询的延迟分位数，再逐个 EXPLAIN (ANALYZE, BUFFERS)，用于在不同规模下调整索引与视图。
+# EF Core 生成的 LINQ 查询按其 Npgsql 翻译结果改写为等价 SQL；参数（日期区间、供应商、经销商）每次随机取自已有数据
+INCOME_BUCKET = """CASE
+    WHEN customer_income IS NULL THEN 'Unknown'
+    WHEN customer_income < 10000 THEN '[0,1w)'
+    WHEN customer_income < 20000 THEN '[1w,2w)'
+    WHEN customer_income < 30000 THEN '[2w,3w)'
+    WHEN customer_income < 50000 THEN '[3w,5w)'
+    WHEN customer_income < 100000 THEN '[5w,10w)'
+    ELSE '10w+' END"""
+
+# 查询名 -> (SQL, 参数种类)；参数种类决定 make_params 生成哪些参数
+QUERIES = {
+    # AnalyticsService.GetSalesTrendAsync(segment: false)
+    "sales_trend": ("""
+SELECT brand_id, brand_name, date_part('year', sale_date)::int AS y, date_part('month', sale_date)::int AS m,
+       count(*)::int AS units, sum(sale_price) AS revenue
+FROM carco.v_sales_detail
+WHERE sale_date >= %(start)s AND sale_date <= %(end)s
+GROUP BY brand_id, brand_name, date_part('year', sale_date)::int, date_part('month', sale_date)::int
+ORDER BY y, m, brand_name""", "sales"),
+    # AnalyticsService.GetSalesTrendAsync(segment: true)：另按性别与收入区间分组
+    "sales_trend_segment": (f"""
+SELECT brand_id, brand_name, date_part('year', sale_date)::int AS y, date_part('month', sale_date)::int AS m,
+       customer_gender, {INCOME_BUCKET} AS income_bucket, count(*)::int AS units, sum(sale_price) AS revenue
+FROM carco.v_sales_detail
+WHERE sale_date >= %(start)s AND sale_date <= %(end)s
+GROUP BY brand_id, brand_name, date_part('year', sale_date)::int, date_part('month', sale_date)::int, customer_gender, {INCOME_BUCKET}
+ORDER BY y, m, brand_name, customer_gender, income_bucket""", "sales"),
+    # AnalyticsService.GetTopBrandsRevenueAsync / GetTopBrandsUnitsAsync
+    "top_brands_revenue": ("""
+SELECT brand_id, brand_name, count(*)::int AS units, sum(sale_price) AS revenue
+FROM carco.v_sales_detail
+WHERE sale_date >= %(start)s AND sale_date <= %(end)s
+GROUP BY brand_id, brand_name
+ORDER BY revenue DESC
+LIMIT %(limit)s""", "sales"),
+    "top_brands_units": ("""
+SELECT brand_id, brand_name, count(*)::int AS units, sum(sale_price) AS revenue
+FROM carco.v_sales_detail
+WHERE sale_date >= %(start)s AND sale_date <= %(end)s
+GROUP BY brand_id, brand_name
+ORDER BY units DESC
+LIMIT %(limit)s""", "sales"),
+    # AnalyticsService.GetDealerWithLongestDwellAsync：已售样本的平均库存天数，经销商名取自 v_sales_detail
+    "dealer_dwell": ("""
+SELECT d.dealer_id, s.dealer_name, avg(d.days_in_inventory::float8) AS avg_days, count(*)::int AS sample_size
+FROM carco.v_dealer_inventory_dwell d
+JOIN carco.v_sales_detail s ON s.vehicle_id = d.vehicle_id
+WHERE d.sale_date IS NOT NULL AND d.sale_date >= %(start)s AND d.sale_date <= %(end)s AND d.days_in_inventory IS NOT NULL
+GROUP BY d.dealer_id, s.dealer_name
+ORDER BY avg_days DESC
+LIMIT 1""", "sales"),
+    # InventoryService.GetUnsoldAsync（指定经销商，第一页）
+    "unsold_inventory": ("""
+SELECT v.vin, ia.dealer_id, d.name AS dealer_name, ia.received_at, (%(as_of)s::date - ia.received_at) AS days_in_inventory
+FROM carco.inventory_assignment ia
+JOIN carco.vehicle v ON v.vehicle_id = ia.vehicle_id
+JOIN carco.dealer d ON d.dealer_id = ia.dealer_id
+LEFT JOIN carco.sale s ON s.vehicle_id = ia.vehicle_id
+WHERE s.vehicle_id IS NULL AND ia.dealer_id = %(dealer_id)s
+ORDER BY 5 DESC
+LIMIT 50 OFFSET 0""", "inventory"),
+    # InventoryService.GetAgeingAsync（全部经销商）
+    "inventory_ageing": ("""
+WITH base AS (
+  SELECT (%(as_of)s::date - ia.received_at) AS days
+  FROM carco.inventory_assignment ia
+  LEFT JOIN carco.sale s ON s.vehicle_id = ia.vehicle_id
+  WHERE s.vehicle_id IS NULL
+)
+SELECT CASE WHEN days <= 30 THEN '0-30' WHEN days <= 60 THEN '31-60' WHEN days <= 90 THEN '61-90' ELSE '90+' END AS bucket,
+       count(*) AS count
+FROM base
+GROUP BY 1
+ORDER BY 1""", "inventory"),
+    # RecallService.GetTransmissionRecallAsync / GetTransmissionRecallUnsoldAsync
+    "recall_hits": ("""
+SELECT vin, serial_number, production_date, customer_name, sale_date
+FROM carco.v_transmission_installs
+WHERE supplier_name = %(supplier)s AND production_date >= %(start)s AND production_date <= %(end)s
+ORDER BY vin""", "recall"),
+    "recall_unsold": ("""
+SELECT vin, serial_number, production_date
+FROM carco.v_transmission_installs
+WHERE supplier_name = %(supplier)s AND production_date >= %(start)s AND production_date <= %(end)s AND sale_id IS NULL
+ORDER BY vin""", "recall"),
+    # RecallService.GetTransmissionRecallByModelAsync
+    "recall_by_model": ("""
+SELECT m.name AS model_name,
+       sum(CASE WHEN s.sale_id IS NOT NULL THEN 1 ELSE 0 END)::int AS sold,
+       sum(CASE WHEN s.sale_id IS NULL THEN 1 ELSE 0 END)::int AS unsold,
+       count(*)::int AS total
+FROM carco.vehicle v
+JOIN carco.model m ON m.model_id = v.model_id
+JOIN carco.transmission_unit tu ON tu.transmission_unit_id = v.transmission_unit_id
+JOIN carco.supplier sup ON sup.supplier_id = tu.supplier_id
+LEFT JOIN carco.sale s ON s.vehicle_id = v.vehicle_id
+WHERE sup.name = %(supplier)s AND tu.production_date BETWEEN %(start)s AND %(end)s
+GROUP BY m.name
+ORDER BY total DESC""", "recall"),
+}
+
+# 参数取值范围：销售日期、变速器生产日期、供应商与经销商
+DOMAIN_SQL = """
+SELECT
+  (SELECT min(sale_date) FROM carco.sale),
+  (SELECT max(sale_date) FROM carco.sale),
+  (SELECT min(production_date) FROM carco.transmission_unit),
+  (SELECT max(production_date) FROM carco.transmission_unit),
+  (SELECT array_agg(name ORDER BY name) FROM carco.supplier),
+  (SELECT array_agg(dealer_id ORDER BY dealer_id) FROM carco.dealer)
+"""
+
+
+def load_domain(conn) -> dict:
+    with conn.cursor() as cur:
+        cur.execute(DOMAIN_SQL)
+        sale_min, sale_max, prod_min, prod_max, suppliers, dealers = cur.fetchone()
+    if sale_min is None or prod_min is None or not suppliers or not dealers:
+        raise SystemExit("carco 中没有数据：先用 data_init/main.py 灌数")
+    return {"sales": (sale_min, sale_max), "production": (prod_min, prod_max), "suppliers": suppliers, "dealers": dealers}
+
+
+def _window(rng: random.Random, lo: date, hi: date, days: int) -> tuple[date, date]:
+    # 区间内随机起点、长度为 days 的日期窗口（数据跨度不足时取全部）
+    span = (hi - lo).days
+    if span <= days:
+        return lo, hi
+    start = lo + timedelta(days=rng.randrange(span - days + 1))
+    return start, start + timedelta(days=days)
+
+
+def make_params(kind: str, rng: random.Random, domain: dict, window_days: int) -> dict:
+    if kind == "sales":
+        start, end = _window(rng, *domain["sales"], window_days)
+        return {"start": start, "end": end, "limit": 10}
+    if kind == "inventory":
+        return {"as_of": domain["sales"][1], "dealer_id": rng.choice(domain["dealers"])}
+    start, end = _window(rng, *domain["production"], window_days)
+    return {"supplier": rng.choice(domain["suppliers"]), "start": start, "end": end}
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    # 最近秩法
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class Worker(threading.Thread):
+    # 每个并发连接一个线程：按查询列表轮流执行（起始位置错开），直到截止时间或达到次数
+    def __init__(self, index: int, dsn: str, names: list[str], domain: dict, args, deadline: float):
+        super().__init__(name=f"workload-{index}", daemon=True)
+        self.index = index
+        self.dsn = dsn
+        self.names = names
+        self.domain = domain
+        self.args = args
+        self.deadline = deadline
+        self.rng = random.Random(args.seed * 1_000_003 + index)
+        self.latencies: dict[str, list[float]] = {name: [] for name in names}
+        self.errors: dict[str, int] = {name: 0 for name in names}
+        self.last_error: str | None = None
+
+    def run(self):
+        try:
+            self._run()
+        except psycopg.Error as e:
+            self.last_error = f"连接失败：{e}".strip()
+
+    def _run(self):
+        with psycopg.connect(self.dsn, autocommit=True) as conn, conn.cursor() as cur:
+            if self.args.statement_timeout:
+                cur.execute(f"SET statement_timeout = {int(self.args.statement_timeout * 1000)}")
+            i = self.index
+            while True:
+                if self.args.iterations:
+                    if i - self.index >= self.args.iterations * len(self.names):
+                        return
+                elif time.perf_counter() >= self.deadline:
+                    return
+                name = self.names[i % len(self.names)]
+                i += 1
+                sql, kind = QUERIES[name]
+                params = make_params(kind, self.rng, self.domain, self.args.window_days)
+                started = time.perf_counter()
+                try:
+                    cur.execute(sql, params)
+                    cur.fetchall()
+                except psycopg.Error as e:
+                    self.errors[name] += 1
+                    self.last_error = f"{name}: {e}".strip()
+                    continue
+                self.latencies[name].append(time.perf_counter() - started)
+
+
+def _walk(node: dict, depth: int = 0):
+    yield node, depth
+    for child in node.get("Plans", ()):
+        yield from _walk(child, depth + 1)
+
+
+def explain(conn, sql: str, params: dict) -> dict:
+    # EXPLAIN (ANALYZE, BUFFERS) 摘要：总耗时、缓冲区命中/读入、扫描方式、落盘的排序/哈希与最大的行数估计偏差
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        doc = cur.fetchone()[0][0]
+    plan = doc["Plan"]
+    scans, spills = set(), []
+    worst = None
+    for node, _ in _walk(plan):
+        node_type = node["Node Type"]
+        if "Scan" in node_type:
+            target = node.get("Index Name") or node.get("Relation Name") or node.get("CTE Name") or ""
+            scans.add(f"{node_type} {target}".strip())
+        if node.get("Temp Written Blocks") or node.get("Sort Space Type") == "Disk" or node.get("Hash Batches", 1) > 1:
+            spills.append(node_type)
+        actual = node.get("Actual Rows", 0) * max(1, node.get("Actual Loops", 1))
+        estimated = node.get("Plan Rows", 0) * max(1, node.get("Actual Loops", 1))
+        ratio = max(actual, 1) / max(estimated, 1)
+        ratio = max(ratio, 1 / ratio)
+        if worst is None or ratio > worst[0]:
+            worst = (ratio, node_type, estimated, actual)
+    return {
+        "planning_ms": doc.get("Planning Time"),
+        "execution_ms": doc.get("Execution Time"),
+        "rows": plan.get("Actual Rows"),
+        "shared_hit_blocks": plan.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": plan.get("Shared Read Blocks", 0),
+        "temp_written_blocks": plan.get("Temp Written Blocks", 0),
+        "scans": sorted(scans),
+        "spills": spills,
+        "worst_estimate": {"node": worst[1], "estimated": worst[2], "actual": worst[3], "ratio": round(worst[0], 1)},
+        "plan": doc,
+    }
+
+
+def summarize(workers: list[Worker], names: list[str], elapsed: float) -> dict[str, dict]:
+    stats = {}
+    for name in names:
+        values = sorted(v for w in workers for v in w.latencies[name])
+        errors = sum(w.errors[name] for w in workers)
+        entry = {"count": len(values), "errors": errors, "qps": len(values) / elapsed if elapsed > 0 else None}
+        if values:
+            entry.update({
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": values[-1] * 1000,
+            })
+        stats[name] = entry
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CarCo query workload (backend SQL shapes)")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="已灌数的数据库（默认 DATABASE_URL）")
+    parser.add_argument("--queries", default=",".join(QUERIES), help=f"逗号分隔的查询名：{', '.join(QUERIES)}")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发连接数")
+    parser.add_argument("--duration", type=float, default=30.0, help="计时阶段秒数")
+    parser.add_argument("--iterations", type=int, default=0, help="每个连接对每个查询执行的次数（>0 时代替 --duration）")
+    parser.add_argument("--warmup", type=int, default=1, help="计时前每个查询在单个连接上预热执行的次数")
+    parser.add_argument("--window-days", type=int, default=365, help="销售与生产日期区间参数的天数")
+    parser.add_argument("--statement-timeout", type=float, default=0, help="单条查询超时秒数（0 为不限），超时计为错误")
+    parser.add_argument("--seed", type=int, default=42, help="参数随机种子")
+    parser.add_argument("--no-explain", action="store_true", help="跳过 EXPLAIN (ANALYZE, BUFFERS)")
+    parser.add_argument("--out", default=None, help="结果（含完整执行计划）写成 JSON")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        raise SystemExit("DATABASE_URL or --dsn must be provided")
+    names = [n for n in args.queries.split(",") if n]
+    unknown = set(names) - set(QUERIES)
+    if unknown:
+        raise SystemExit(f"unknown queries: {', '.join(sorted(unknown))}")
+
+    with psycopg.connect(args.dsn, autocommit=True) as conn:
+        domain = load_domain(conn)
+        with conn.cursor() as cur:
+            cur.execute("SELECT (SELECT count(*) FROM carco.vehicle), (SELECT count(*) FROM carco.sale)")
+            vehicles, sales = cur.fetchone()
+            rng = random.Random(args.seed)
+            for name in names:
+                sql, kind = QUERIES[name]
+                for _ in range(args.warmup):
+                    cur.execute(sql, make_params(kind, rng, domain, args.window_days))
+                    cur.fetchall()
+    print(f"carco：{vehicles:,} 辆车，{sales:,} 条销售；{len(names)} 个查询，{args.concurrency} 个并发连接")
+
+    started = time.perf_counter()
+    workers = [Worker(i, args.dsn, names, domain, args, started + args.duration) for i in range(max(1, args.concurrency))]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    stats = summarize(workers, names, elapsed)
+
+    plans = {}
+    if not args.no_explain:
+        # 计时阶段之后逐个执行（缓存已热），参数取自固定种子
+        rng = random.Random(args.seed)
+        with psycopg.connect(args.dsn, autocommit=True) as conn:
+            for name in names:
+                sql, kind = QUERIES[name]
+                try:
+                    plans[name] = explain(conn, sql, make_params(kind, rng, domain, args.window_days))
+                except psycopg.Error as e:
+                    plans[name] = {"error": str(e).strip()}
+
+    print(f"{'query':<22}{'count':>8}{'qps':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'errors':>8}")
+    for name, s in stats.items():
+        if s["count"]:
+            print(f"{name:<22}{s['count']:>8,}{s['qps']:>9.1f}{s['p50_ms']:>8.1f}ms{s['p95_ms']:>8.1f}ms{s['p99_ms']:>8.1f}ms{s['max_ms']:>8.1f}ms{s['errors']:>8}")
+        else:
+            print(f"{name:<22}{0:>8}{'-':>9}{'-':>10}{'-':>10}{'-':>10}{'-':>10}{s['errors']:>8}")
+    for w in workers:
+        if w.last_error:
+            print(f"错误（{w.name}）：{w.last_error}")
+    for name, p in plans.items():
+        if "error" in p:
+            print(f"\n{name}: EXPLAIN 失败：{p['error']}")
+            continue
+        worst = p["worst_estimate"]
+        print(
+            f"\n{name}: 执行 {p['execution_ms']:.1f} ms（规划 {p['planning_ms']:.1f} ms），{p['rows']:,} 行，"
+            f"缓冲区命中 {p['shared_hit_blocks']:,} / 读入 {p['shared_read_blocks']:,} / 临时写 {p['temp_written_blocks']:,}"
+        )
+        print(f"  扫描：{'；'.join(p['scans'])}")
+        if p["spills"]:
+            print(f"  落盘：{'、'.join(p['spills'])}")
+        if worst["ratio"] >= 10:
+            print(f"  行数估计偏差最大：{worst['node']} 估计 {worst['estimated']:,} / 实际 {worst['actual']:,}")
+
+    if args.out:
+        output = {
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "vehicles": vehicles,
+            "sales": sales,
+            "args": vars(args),
+            "elapsed_seconds": elapsed,
+            "queries": {name: {**stats[name], "explain": plans.get(name)} for name in names},
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2, default=str)
+        print(f"\n结果已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
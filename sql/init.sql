@@ -115,6 +115,36 @@ CREATE TABLE carco.sale (
   sale_price     NUMERIC(12,2) NOT NULL CHECK (sale_price > 0)
 );
 
+-- Pre-aggregated rollups, written by data_init alongside the raw data (month = first day of month)
+CREATE TABLE carco.rollup_sales_monthly (
+  month      DATE NOT NULL,
+  brand_id   BIGINT NOT NULL REFERENCES carco.brand(brand_id),
+  model_id   BIGINT NOT NULL REFERENCES carco.model(model_id),
+  units      BIGINT NOT NULL,
+  revenue    NUMERIC(18,2) NOT NULL,
+  PRIMARY KEY (month, model_id)
+);
+
+-- Sold vehicles by dealer and sale month; average dwell = dwell_days / sold_units
+CREATE TABLE carco.rollup_dealer_dwell (
+  dealer_id   BIGINT NOT NULL REFERENCES carco.dealer(dealer_id),
+  month       DATE NOT NULL,
+  sold_units  BIGINT NOT NULL,
+  dwell_days  BIGINT NOT NULL,
+  PRIMARY KEY (dealer_id, month)
+);
+
+-- Installed transmission units by supplier, spec, model and production month
+CREATE TABLE carco.rollup_recall_hits (
+  supplier_id   BIGINT NOT NULL REFERENCES carco.supplier(supplier_id),
+  part_spec_id  BIGINT NOT NULL REFERENCES carco.part_spec(part_spec_id),
+  model_id      BIGINT NOT NULL REFERENCES carco.model(model_id),
+  month         DATE NOT NULL,
+  units         BIGINT NOT NULL,
+  sold_units    BIGINT NOT NULL,
+  PRIMARY KEY (supplier_id, part_spec_id, model_id, month)
+);
+
 -- 3) Triggers to enforce cross-table business rules
 
 -- Ensure configuration.transmission_spec_id refers to a Transmission part_spec